@@ -0,0 +1,75 @@
+"""Caption, tag and index photos the background pipeline missed.
+
+New photos are captioned by the API workers shortly after upload, but
+that queue lives in memory: photos dropped under load, queued during a
+restart or whose caption failed keep a NULL ai_caption. This command
+works through them in batches. With --reindex it instead re-embeds the
+captions already stored (e.g. after the photo collection was lost),
+without calling the caption model.
+
+Usage (from backend/):
+    python -m app.commands.caption_photos [--user USER_ID] [--batch-size N]
+    python -m app.commands.caption_photos --reindex [--user USER_ID]
+"""
+import argparse
+import asyncio
+from sqlalchemy import select
+from app.core.ai_client import ai_client
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.photo_captioning import PHOTO_COLUMNS, photo_captioner, search_text
+from app.core.redis import close_redis
+from app.models.photo import Photo
+
+async def _batches(user_id, captioned: bool, batch_size: int):
+    """Yield matching photos in id order, one batch per query."""
+    last_id = ""
+    while True:
+        stmt = select(*PHOTO_COLUMNS).where(Photo.id > last_id).order_by(Photo.id).limit(batch_size)
+        stmt = stmt.where(Photo.ai_caption.is_not(None) if captioned else Photo.ai_caption.is_(None))
+        if user_id:
+            stmt = stmt.where(Photo.user_id == user_id)
+        async with AsyncSessionLocal() as db:
+            photos = (await db.execute(stmt)).all()
+        if not photos:
+            return
+        yield photos
+        last_id = photos[-1].id
+
+async def main():
+    parser = argparse.ArgumentParser(description="Caption and index photos without an AI caption.")
+    parser.add_argument("--user", help="only process this user's photos")
+    parser.add_argument("--batch-size", type=int, default=settings.PHOTO_CAPTION_BATCH_SIZE)
+    parser.add_argument("--reindex", action="store_true", help="re-embed stored captions instead")
+    args = parser.parse_args()
+    
+    if not photo_captioner.enabled:
+        print("Photo captioning needs OPENAI_API_KEY and PHOTO_CAPTION_ENABLED")
+        return
+    
+    try:
+        seen = processed = 0
+        async for photos in _batches(args.user, args.reindex, args.batch_size):
+            seen += len(photos)
+            if args.reindex:
+                await photo_captioner.index([
+                    {"id": photo.id, "user_id": photo.user_id, "text": search_text(photo, photo.ai_caption, photo.ai_tags)}
+                    for photo in photos
+                ])
+            else:
+                processed += await photo_captioner.process([photo.id for photo in photos])
+            print(f"{seen} photos seen")
+        
+        stats = photo_captioner.stats()
+        if args.reindex:
+            print(f"Indexed {stats['indexed']} photos, {stats['index_failed']} failed")
+        else:
+            print(f"Captioned {processed} of {seen} photos, {stats['failed']} failed; "
+                  f"indexed {stats['indexed']}, {stats['index_failed']} failed")
+    finally:
+        await ai_client.close()
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
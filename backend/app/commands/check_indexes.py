@@ -0,0 +1,180 @@
+"""Check that the hot per-user queries are served by their composite indexes.
+
+Seeds synthetic rows inside a transaction (half of them for one heavy user,
+whose queries are checked, the rest spread over a few hundred users), runs
+ANALYZE, and EXPLAINs the queries the list endpoints issue. Each query must
+use its expected index, and keyset-paginated queries must not need a Sort
+(the index already returns rows in page order). Everything is rolled back
+at the end.
+
+Usage (from backend/, against a migrated PostgreSQL database):
+    python -m app.commands.check_indexes [--rows N]
+
+Exits non-zero when a plan does not use the expected index.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, datetime
+from typing import Dict, Iterator, List, NamedTuple
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.models import Transaction, PantryItem, HuntingSighting, Photo
+
+USERS = 200
+USER_ID = "index-check-user-7"
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, hashed_password, is_active, is_superuser, created_at, updated_at)
+    SELECT 'index-check-user-' || u, 'index-check-' || u || '@example.com', 'x', true, false, now(), now()
+    FROM generate_series(0, :users - 1) AS u
+    """,
+    """
+    INSERT INTO transactions (id, user_id, type, amount, category, description, date, created_at, updated_at)
+    SELECT 'index-check-' || g, 'index-check-user-' || (CASE WHEN g % 2 = 0 THEN 7 ELSE g % :users END), 'EXPENSE', g % 200,
+           (ARRAY['groceries', 'fuel', 'rent', 'fun'])[g % 4 + 1], NULL,
+           DATE '2024-01-01' + (g % 730), now(), now()
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO pantry_items (id, user_id, name, category, quantity, expiration_date, location, created_at, updated_at)
+    SELECT 'index-check-' || g, 'index-check-user-' || (CASE WHEN g % 2 = 0 THEN 7 ELSE g % :users END), 'item ' || g, 'produce', 1,
+           DATE '2024-01-01' + (g % 365), 'fridge',
+           TIMESTAMP '2024-01-01' + g * INTERVAL '1 minute', now()
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO hunting_sightings (id, user_id, species, count, date, created_at, updated_at)
+    SELECT 'index-check-' || g, 'index-check-user-' || (CASE WHEN g % 2 = 0 THEN 7 ELSE g % :users END),
+           (ARRAY['deer', 'turkey', 'elk', 'bear'])[g % 4 + 1], 1,
+           TIMESTAMP '2024-01-01' + g * INTERVAL '17 minutes', now(), now()
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO photos (id, user_id, file_path, file_name, created_at, updated_at)
+    SELECT 'index-check-' || g, 'index-check-user-' || (CASE WHEN g % 2 = 0 THEN 7 ELSE g % :users END), '/uploads/' || g || '.jpg', g || '.jpg',
+           TIMESTAMP '2024-01-01' + g * INTERVAL '1 minute', now()
+    FROM generate_series(1, :rows) AS g
+    """,
+]
+
+class Check(NamedTuple):
+    name: str
+    statement: object
+    index: str
+    ordered: bool
+
+def _page(stmt, sort_columns, cursor=None, limit: int = settings.PAGE_DEFAULT_LIMIT):
+    """Apply the same keyset ordering as app.core.pagination.paginate."""
+    if cursor is not None:
+        stmt = stmt.where(tuple_(*sort_columns) < tuple_(*cursor))
+    return stmt.order_by(*[column.desc() for column in sort_columns]).limit(limit + 1)
+
+def build_checks() -> List[Check]:
+    transactions = select(Transaction).where(Transaction.user_id == USER_ID)
+    pantry = select(PantryItem).where(PantryItem.user_id == USER_ID)
+    sightings = select(HuntingSighting).where(HuntingSighting.user_id == USER_ID)
+    photos = select(Photo).where(Photo.user_id == USER_ID)
+    
+    return [
+        Check(
+            "transactions by date range",
+            _page(transactions.where(Transaction.date >= date(2024, 3, 1), Transaction.date <= date(2024, 6, 30)),
+                  [Transaction.date, Transaction.id]),
+            "ix_transactions_user_date", True
+        ),
+        Check(
+            "transactions, next page",
+            _page(transactions, [Transaction.date, Transaction.id], cursor=[date(2024, 9, 1), "index-check-5"]),
+            "ix_transactions_user_date", True
+        ),
+        Check(
+            "pantry items",
+            _page(pantry, [PantryItem.created_at, PantryItem.id]),
+            "ix_pantry_items_user_created", True
+        ),
+        Check(
+            "pantry items expiring soon",
+            pantry.where(PantryItem.expiration_date <= date(2024, 1, 8)).order_by(PantryItem.expiration_date),
+            "ix_pantry_items_user_expiration", False
+        ),
+        Check(
+            "sightings",
+            _page(sightings, [HuntingSighting.date, HuntingSighting.id]),
+            "ix_hunting_sightings_user_date", True
+        ),
+        Check(
+            "sightings by species",
+            _page(sightings.where(HuntingSighting.species == "elk"), [HuntingSighting.date, HuntingSighting.id]),
+            "ix_hunting_sightings_user_species_date", True
+        ),
+        Check(
+            "sightings by species and date range",
+            _page(sightings.where(
+                HuntingSighting.species == "deer",
+                HuntingSighting.date >= datetime(2024, 2, 1),
+                HuntingSighting.date < datetime(2024, 3, 1)
+            ), [HuntingSighting.date, HuntingSighting.id]),
+            "ix_hunting_sightings_user_species_date", True
+        ),
+        Check(
+            "photos",
+            _page(photos, [Photo.created_at, Photo.id]),
+            "ix_photos_user_created", True
+        ),
+    ]
+
+def plan_nodes(node: Dict) -> Iterator[Dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+async def run_checks(rows: int) -> bool:
+    engine = create_async_engine(settings.DATABASE_URL)
+    ok = True
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                for statement in SEED_SQL:
+                    await conn.execute(text(statement), {"users": USERS, "rows": rows})
+                for table in ("users", "transactions", "pantry_items", "hunting_sightings", "photos"):
+                    await conn.execute(text(f"ANALYZE {table}"))
+                
+                for check in build_checks():
+                    sql = str(check.statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+                    plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    nodes = list(plan_nodes(plan[0]["Plan"]))
+                    
+                    indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+                    sorted_in_memory = any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes)
+                    passed = check.index in indexes and not (check.ordered and sorted_in_memory)
+                    ok = ok and passed
+                    
+                    detail = ", ".join(sorted(indexes)) or "no index"
+                    if sorted_in_memory:
+                        detail += " + sort"
+                    print(f"{'ok  ' if passed else 'FAIL'}  {check.name}: {detail}")
+                    if not passed:
+                        print(json.dumps(plan, indent=2))
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot per-user queries and check their indexes.")
+    parser.add_argument("--rows", type=int, default=50000, help="synthetic rows per table (rolled back)")
+    args = parser.parse_args()
+    
+    if not asyncio.run(run_checks(args.rows)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Fill photo location, capture time and camera from the files' EXIF headers.
+
+Uploads are read on the way in; run this for photos created before that
+or added by file_path. Only the EXIF header of each file is read, in the
+photo process pool (PHOTO_PROCESS_WORKERS). Fields that are already set
+are kept unless --overwrite is given.
+
+Usage (from backend/):
+    python -m app.commands.extract_photo_metadata [--user USER_ID] [--batch-size N] [--overwrite]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from sqlalchemy import bindparam, func, or_, select, update
+from app.core.database import AsyncSessionLocal, engine
+from app.core.photo_storage import photo_storage
+from app.core.query_cache import query_cache
+from app.core.redis import close_redis
+from app.models.photo import Photo
+
+FIELDS = ("taken_at", "latitude", "longitude", "camera")
+
+def _update_statement(overwrite: bool):
+    """executemany UPDATE by id; NULL parameters never clear a column."""
+    table = Photo.__table__
+    values = {
+        name: func.coalesce(bindparam(name), table.c[name]) if overwrite else func.coalesce(table.c[name], bindparam(name))
+        for name in FIELDS
+    }
+    return update(table).where(table.c.id == bindparam("photo_id")).values(**values, updated_at=bindparam("now"))
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fill photo metadata from EXIF headers.")
+    parser.add_argument("--user", help="only process this user's photos")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--overwrite", action="store_true", help="replace values that are already set")
+    args = parser.parse_args()
+    
+    stmt = _update_statement(args.overwrite)
+    try:
+        last_id = ""
+        seen = updated = 0
+        users = set()
+        while True:
+            query = (
+                select(Photo.id, Photo.user_id, Photo.file_path)
+                .where(Photo.id > last_id, ~Photo.file_path.startswith("http://"), ~Photo.file_path.startswith("https://"))
+                .order_by(Photo.id)
+                .limit(args.batch_size)
+            )
+            if not args.overwrite:
+                query = query.where(or_(*[Photo.__table__.c[name].is_(None) for name in FIELDS]))
+            if args.user:
+                query = query.where(Photo.user_id == args.user)
+            async with AsyncSessionLocal() as db:
+                photos = (await db.execute(query)).all()
+            if not photos:
+                break
+            last_id = photos[-1].id
+            seen += len(photos)
+            
+            metadata = await photo_storage.read_metadata([photo.file_path for photo in photos])
+            now = datetime.utcnow()
+            rows = [
+                {"photo_id": photo.id, "now": now, **{name: found.get(name) for name in FIELDS}}
+                for photo, found in zip(photos, metadata) if found
+            ]
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(stmt, rows)
+                    await db.commit()
+                updated += len(rows)
+                users.update(photo.user_id for photo, found in zip(photos, metadata) if found)
+            print(f"{seen} photos read, {updated} updated")
+        
+        for user_id in users:
+            await query_cache.invalidate(user_id, Photo.__tablename__)
+        print(f"Filled metadata of {updated} of {seen} photos")
+    finally:
+        photo_storage.shutdown()
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
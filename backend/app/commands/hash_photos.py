@@ -0,0 +1,81 @@
+"""Compute perceptual hashes for photos that don't have one yet.
+
+Uploads are hashed on the way in; run this for photos created before that
+or added by file_path, so they take part in duplicate detection. Files are
+decoded in the photo process pool (PHOTO_PROCESS_WORKERS): the thumbnail
+of uploaded photos, the original of other local files. Photos whose file
+is missing or unreadable are left without a hash.
+
+Usage (from backend/):
+    python -m app.commands.hash_photos [--user USER_ID] [--batch-size N]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from sqlalchemy import bindparam, select, update
+from app.core.database import AsyncSessionLocal, engine
+from app.core.photo_duplicates import to_column
+from app.core.photo_storage import photo_storage
+from app.core.query_cache import query_cache
+from app.core.redis import close_redis
+from app.models.photo import Photo
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compute perceptual hashes of photos.")
+    parser.add_argument("--user", help="only process this user's photos")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    
+    table = Photo.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("photo_id"))
+        .values(perceptual_hash=bindparam("value"), updated_at=bindparam("now"))
+    )
+    try:
+        last_id = ""
+        seen = hashed = 0
+        users = set()
+        while True:
+            query = (
+                select(Photo.id, Photo.user_id, Photo.file_path, Photo.content_hash)
+                .where(
+                    Photo.id > last_id, Photo.perceptual_hash.is_(None),
+                    ~Photo.file_path.startswith("http://"), ~Photo.file_path.startswith("https://"),
+                )
+                .order_by(Photo.id)
+                .limit(args.batch_size)
+            )
+            if args.user:
+                query = query.where(Photo.user_id == args.user)
+            async with AsyncSessionLocal() as db:
+                photos = (await db.execute(query)).all()
+            if not photos:
+                break
+            last_id = photos[-1].id
+            seen += len(photos)
+            
+            values = await photo_storage.image_hashes(photos)
+            now = datetime.utcnow()
+            rows = [
+                {"photo_id": photo.id, "value": to_column(value), "now": now}
+                for photo, value in zip(photos, values) if value is not None
+            ]
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(stmt, rows)
+                    await db.commit()
+                hashed += len(rows)
+                users.update(photo.user_id for photo, value in zip(photos, values) if value is not None)
+            print(f"{seen} photos read, {hashed} hashed")
+        
+        for user_id in users:
+            await query_cache.invalidate(user_id, Photo.__tablename__)
+        print(f"Hashed {hashed} of {seen} photos")
+    finally:
+        photo_storage.shutdown()
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
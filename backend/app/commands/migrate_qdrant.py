@@ -0,0 +1,155 @@
+"""Rebuild Qdrant collections into the current layout.
+
+Copies every point of a collection into a new physical collection created
+with the layout from app.core.qdrant_layout (user_id payload index, scalar
+quantization, optional on-disk vectors), then points the original name at
+it through an alias. The app resolves aliases transparently.
+
+Usage (from backend/):
+    python -m app.commands.migrate_qdrant [--collection NAME] [--batch-size N] [--keep-old] [--offline]
+
+Run it while the API is stopped or idle: writes that land in the old
+collection after its points were copied are not carried over.
+
+A collection that is not behind an alias yet (the layout before this
+command existed) has to be deleted before the alias can take its name.
+Until the alias exists, a running API would recreate an empty collection
+under that name, so these collections are only migrated with --offline,
+which confirms the API and workers are stopped. If creating the alias
+fails, the points are copied back into a plain collection.
+"""
+import argparse
+import asyncio
+import time
+from app.core import qdrant_layout
+from app.core.config import settings
+
+async def resolve_collection(client, name: str):
+    """Return (physical collection, is_alias) for a collection name."""
+    aliases = await client.get_aliases()
+    for alias in aliases.aliases:
+        if alias.alias_name == name:
+            return alias.collection_name, True
+    return name, False
+
+async def copy_points(client, source: str, target: str, batch_size: int) -> int:
+    from qdrant_client.models import PointStruct
+    
+    copied = 0
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if records:
+            await client.upsert(
+                collection_name=target,
+                points=[PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records]
+            )
+            copied += len(records)
+            print(f"  copied {copied} points")
+        if offset is None:
+            return copied
+
+async def restore_collection(client, name: str, source: str, batch_size: int):
+    """Copy source back into a plain collection called name, after a failed alias swap."""
+    if not await qdrant_layout.collection_exists(client, name):
+        await qdrant_layout.create_collection(client, name)
+    await copy_points(client, source, name, batch_size)
+    expected = (await client.count(collection_name=source, exact=True)).count
+    actual = (await client.count(collection_name=name, exact=True)).count
+    if actual < expected:
+        raise RuntimeError(f"{name}: restored {actual} of {expected} points; all of them are still in {source}")
+    await client.delete_collection(source)
+
+async def migrate(client, name: str, batch_size: int, keep_old: bool, offline: bool = False):
+    from qdrant_client.models import CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+    
+    if not await qdrant_layout.collection_exists(client, name):
+        print(f"{name}: does not exist, creating it with the current layout")
+        await qdrant_layout.create_collection(client, name)
+        return
+    
+    source, is_alias = await resolve_collection(client, name)
+    if not is_alias:
+        if not offline:
+            print(
+                f"{name}: skipped, it is not behind an alias yet. Converting it deletes the collection "
+                "before the alias replaces it, so stop the API and workers and rerun with --offline."
+            )
+            return
+        if keep_old:
+            print(f"{name}: --keep-old is ignored, the collection has to be deleted for the alias to take its name")
+            keep_old = False
+    
+    target = f"{name}_{int(time.time() * 1000)}"
+    print(f"{name}: rebuilding {source} into {target}")
+    
+    await qdrant_layout.create_collection(client, name, physical_name=target)
+    copied = await copy_points(client, source, target, batch_size)
+    
+    expected = (await client.count(collection_name=source, exact=True)).count
+    actual = (await client.count(collection_name=target, exact=True)).count
+    if actual < expected:
+        await client.delete_collection(target)
+        raise RuntimeError(f"{name}: copied {actual} of {expected} points, aborting (old collection untouched)")
+    
+    if is_alias:
+        # Atomic swap: both operations are applied in one request
+        await client.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)),
+        ])
+    else:
+        # A collection and an alias cannot share a name, so the legacy
+        # collection has to go before the alias can take over its name.
+        await client.delete_collection(source)
+        try:
+            await client.update_collection_aliases(change_aliases_operations=[
+                CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)),
+            ])
+            created = await resolve_collection(client, name) == (target, True)
+            error = None
+        except Exception as e:
+            created, error = False, e
+        if not created:
+            print(f"{name}: creating the alias failed ({error or 'alias not found'}), restoring the collection from {target}")
+            await restore_collection(client, name, target, batch_size)
+            raise RuntimeError(f"{name}: alias swap failed, restored as a plain collection")
+    
+    if is_alias and not keep_old:
+        await client.delete_collection(source)
+    
+    print(f"{name}: {copied} points now served from {target}")
+
+async def main():
+    from qdrant_client import AsyncQdrantClient
+    
+    parser = argparse.ArgumentParser(description="Rebuild Qdrant collections into the current layout.")
+    parser.add_argument("--collection", action="append",
+                        help="collection to migrate (repeatable); defaults to the memory, response cache and photo collections")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--keep-old", action="store_true",
+                        help="keep the previous physical collection when swapping an alias")
+    parser.add_argument("--offline", action="store_true",
+                        help="the API and workers are stopped; required to convert collections that are not aliases yet")
+    args = parser.parse_args()
+    
+    names = args.collection or [
+        settings.QDRANT_COLLECTION_NAME,
+        settings.QDRANT_RESPONSE_CACHE_COLLECTION,
+        settings.QDRANT_PHOTO_COLLECTION_NAME,
+    ]
+    client = AsyncQdrantClient(url=settings.QDRANT_URL, timeout=60)
+    try:
+        for name in names:
+            await migrate(client, name, args.batch_size, args.keep_old, args.offline)
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""Recompute the monthly transaction totals behind the budget analytics.
+
+The totals are maintained incrementally as transactions are created; run
+this after changing transactions outside the API or to repair drift.
+Transactions created while it runs wait for the rebuild to commit and are
+then added on top, so the API can stay up. Cached analytics responses of
+the rebuilt users are invalidated afterwards.
+
+Usage (from backend/):
+    python -m app.commands.rebuild_budget_rollups [--user USER_ID]
+"""
+import argparse
+import asyncio
+from sqlalchemy import select
+from app.core import budget_rollups
+from app.core.database import AsyncSessionLocal, engine
+from app.core.query_cache import query_cache
+from app.core.redis import close_redis
+from app.models import Transaction, User
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute the monthly transaction totals.")
+    parser.add_argument("--user", help="only rebuild this user's totals")
+    args = parser.parse_args()
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            rows = await budget_rollups.rebuild(db, args.user)
+            await db.commit()
+            users = [args.user] if args.user else (await db.scalars(select(User.id))).all()
+        print(f"Rebuilt {rows} monthly total rows")
+        
+        # Cached analytics are keyed on the transactions collection
+        for user_id in users:
+            await query_cache.invalidate(user_id, Transaction.__tablename__)
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""Activate or deactivate a user and drop it from the auth cache.
+
+The Redis entry is deleted right away; running API workers drop their
+in-process copy within AUTH_USER_CACHE_TTL_SECONDS, after which a
+deactivated user's tokens get 403.
+
+Usage (from backend/):
+    python -m app.commands.set_user_active EMAIL --inactive
+    python -m app.commands.set_user_active EMAIL --active
+"""
+import argparse
+import asyncio
+from sqlalchemy import update
+from app.core.auth_cache import auth_cache
+from app.core.database import AsyncSessionLocal, engine
+from app.core.redis import close_redis
+from app.models.user import User
+
+async def main():
+    parser = argparse.ArgumentParser(description="Activate or deactivate a user.")
+    parser.add_argument("email")
+    state = parser.add_mutually_exclusive_group(required=True)
+    state.add_argument("--active", dest="is_active", action="store_true")
+    state.add_argument("--inactive", dest="is_active", action="store_false")
+    args = parser.parse_args()
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(User).where(User.email == args.email).values(is_active=args.is_active).returning(User.id)
+            )
+            user_id = result.scalar_one_or_none()
+            await db.commit()
+        
+        if user_id is None:
+            print(f"No user with email {args.email}")
+            return
+        await auth_cache.invalidate_user(user_id)
+        print(f"{args.email} is now {'active' if args.is_active else 'inactive'}")
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
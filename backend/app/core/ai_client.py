@@ -1,145 +1,464 @@
-from typing import List, Optional, Dict
-from langchain.chat_models import ChatOpenAI
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.schema import HumanMessage, SystemMessage
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from functools import cached_property
+from typing import AsyncIterator, Hashable, List, Optional, Dict
+from app.core import qdrant_layout
 from app.core.config import settings
+from app.core.context_builder import assemble_context, load_encoding
+from app.core.embedding_cache import EmbeddingCache
+from app.core.llm_scheduler import LLMScheduler, SchedulerOverloaded
+from app.core.memory_writer import MemoryWriter
+from app.core.response_cache import ResponseCache
+from app.core.vector_store import VectorHit
+import asyncio
+import json
 import uuid
 
+CHAT_MODEL = "gpt-4-turbo-preview"
+
+PHOTO_CAPTION_PROMPT = (
+    "You describe photos for Nucleus, a life operating system. Reply with JSON only: "
+    '{"caption": "<one sentence describing the photo>", "tags": ["<up to 10 short lowercase tags>"]}. '
+    "If no image is attached, infer what you can from the details given and keep the caption modest."
+)
+MAX_PHOTO_TAGS = 10
+
 class AIClient:
-    """Centralized AI client for OpenAI and Qdrant operations."""
+    """Centralized AI client for OpenAI and Qdrant operations.
+    
+    Construction is cheap: LangChain and Qdrant clients are built on first
+    use (or by the background warm-up started from the app lifespan), so
+    importing this module never waits on the network.
+    """
     
     def __init__(self):
         self.openai_api_key = settings.OPENAI_API_KEY
         self.qdrant_url = settings.QDRANT_URL
         
-        if self.openai_api_key:
-            self.llm = ChatOpenAI(
-                openai_api_key=self.openai_api_key,
-                model_name="gpt-4-turbo-preview",
-                temperature=0.7
-            )
-            self.embeddings = OpenAIEmbeddings(openai_api_key=self.openai_api_key)
+        self._ready_collections = set()
+        self._collection_lock = asyncio.Lock()
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.qdrant_error: Optional[str] = None
+        self.embedding_cache = EmbeddingCache()
+        self.memory_writer = MemoryWriter(self.store_memories)
+        self.response_cache = ResponseCache(self)
+        self.llm_scheduler = LLMScheduler(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            per_user_concurrency=settings.LLM_PER_USER_CONCURRENCY,
+            timeout_seconds=settings.LLM_TIMEOUT_SECONDS
+        )
+        self.embedding_scheduler = LLMScheduler(
+            max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+            per_user_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+            timeout_seconds=settings.EMBEDDING_TIMEOUT_SECONDS
+        )
+        # Background captioning gets its own cap, so it never takes chat's slots
+        self.caption_scheduler = LLMScheduler(
+            max_concurrency=settings.PHOTO_CAPTION_CONCURRENCY,
+            per_user_concurrency=settings.PHOTO_CAPTION_CONCURRENCY,
+            timeout_seconds=settings.LLM_TIMEOUT_SECONDS
+        )
+        self.context_tokens_used = 0
+        self.context_tokens_saved = 0
+    
+    @cached_property
+    def llm(self):
+        if not self.openai_api_key:
+            return None
+        from langchain.chat_models import ChatOpenAI
+        
+        return ChatOpenAI(
+            openai_api_key=self.openai_api_key,
+            model_name=CHAT_MODEL,
+            temperature=0.7,
+            # Retries are handled by llm_scheduler, with jitter and a timeout
+            max_retries=0
+        )
+    
+    @cached_property
+    def embeddings(self):
+        if not self.openai_api_key:
+            return None
+        from langchain.embeddings import OpenAIEmbeddings
+        
+        return OpenAIEmbeddings(openai_api_key=self.openai_api_key, max_retries=0)
+    
+    @cached_property
+    def vision_llm(self):
+        """Chat model used to caption photos (see settings.PHOTO_CAPTION_MODEL)."""
+        if not self.openai_api_key:
+            return None
+        from langchain.chat_models import ChatOpenAI
+        
+        return ChatOpenAI(
+            openai_api_key=self.openai_api_key,
+            model_name=settings.PHOTO_CAPTION_MODEL,
+            temperature=0.2,
+            max_tokens=settings.PHOTO_CAPTION_MAX_TOKENS,
+            max_retries=0
+        )
+    
+    @cached_property
+    def qdrant_client(self):
+        import httpx
+        from qdrant_client import AsyncQdrantClient
+        
+        # One async client per process; its HTTP connection pool (or gRPC
+        # channel) is reused by every request instead of blocking the loop.
+        return AsyncQdrantClient(
+            url=self.qdrant_url,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            timeout=settings.QDRANT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    
+    @cached_property
+    def vector_store(self):
+        """The configured vector memory backend (see settings.VECTOR_STORE)."""
+        from app.core.vector_store import LocalVectorStore, QdrantVectorStore
+        
+        if settings.VECTOR_STORE == "local":
+            return LocalVectorStore()
+        if settings.VECTOR_STORE == "hybrid":
+            return LocalVectorStore(fallback=QdrantVectorStore(self))
+        return QdrantVectorStore(self)
+    
+    @cached_property
+    def photo_vectors(self):
+        """Caption embeddings for photo search, kept apart from vector memory."""
+        from app.core.vector_store import LocalVectorStore, QdrantVectorStore
+        
+        photos = QdrantVectorStore(self, settings.QDRANT_PHOTO_COLLECTION_NAME)
+        if settings.VECTOR_STORE == "local":
+            return LocalVectorStore()
+        if settings.VECTOR_STORE == "hybrid":
+            return LocalVectorStore(fallback=photos)
+        return photos
+    
+    def start(self):
+        """Start background work: the memory writer and a one-off warm-up."""
+        self.memory_writer.start()
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warm_up())
+    
+    async def _warm_up(self):
+        # Heavy imports and client construction run off the event loop
+        await asyncio.to_thread(lambda: (self.llm, self.vision_llm, self.embeddings, self.vector_store))
+        await asyncio.to_thread(load_encoding, CHAT_MODEL)
+        if settings.VECTOR_STORE != "local":
+            await asyncio.to_thread(lambda: self.qdrant_client)
+            await self._ensure_collection()
+    
+    def readiness(self) -> Dict:
+        """Report AI dependency state without touching the network."""
+        if settings.VECTOR_STORE == "local":
+            qdrant = "disabled"
+        elif settings.QDRANT_COLLECTION_NAME in self._ready_collections:
+            qdrant = "ready"
+        elif self.qdrant_error:
+            qdrant = "unavailable"
         else:
-            self.llm = None
-            self.embeddings = None
+            qdrant = "pending"
         
-        self.qdrant_client = QdrantClient(url=self.qdrant_url)
-        self._ensure_collection()
+        return {
+            "llm_configured": bool(self.openai_api_key),
+            "qdrant": qdrant,
+            "qdrant_error": self.qdrant_error,
+        }
     
-    def _ensure_collection(self):
-        """Ensure the Qdrant collection exists."""
-        try:
-            collections = self.qdrant_client.get_collections()
-            collection_names = [c.name for c in collections.collections]
+    async def _ensure_collection(self, collection_name: str = settings.QDRANT_COLLECTION_NAME):
+        """Ensure a Qdrant collection and its payload indexes exist (checked once per process)."""
+        if collection_name in self._ready_collections:
+            return
+        
+        async with self._collection_lock:
+            if collection_name in self._ready_collections:
+                return
             
-            if settings.QDRANT_COLLECTION_NAME not in collection_names:
-                self.qdrant_client.create_collection(
-                    collection_name=settings.QDRANT_COLLECTION_NAME,
-                    vectors_config=VectorParams(size=1536, distance=Distance.COSINE)
-                )
-        except Exception as e:
-            print(f"Error ensuring Qdrant collection: {e}")
+            try:
+                if await self._qdrant_call(qdrant_layout.collection_exists(self.qdrant_client, collection_name)):
+                    await self._qdrant_call(qdrant_layout.ensure_payload_indexes(self.qdrant_client, collection_name))
+                else:
+                    await self._qdrant_call(qdrant_layout.create_collection(self.qdrant_client, collection_name))
+                self._ready_collections.add(collection_name)
+                self.qdrant_error = None
+            except Exception as e:
+                self.qdrant_error = str(e) or type(e).__name__
+                print(f"Error ensuring Qdrant collection: {e}")
+    
+    async def _qdrant_call(self, coro):
+        """Await a Qdrant call, bounded by the configured per-call timeout."""
+        return await asyncio.wait_for(coro, timeout=settings.QDRANT_TIMEOUT)
     
-    async def generate_summary(self, content: str, context: str = "") -> Optional[str]:
-        """Generate an AI summary of the given content."""
+    async def close(self):
+        """Stop the warm-up and release the pooled Qdrant connections."""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        if "qdrant_client" in self.__dict__:
+            await self.qdrant_client.close()
+    
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text, reusing cached vectors for identical input."""
+        model = self.embeddings.model
+        
+        async def embed_query(text: str) -> List[float]:
+            return await self.embedding_scheduler.run(
+                ("query", model, text), None, lambda: self.embeddings.aembed_query(text)
+            )
+        
+        return await self.embedding_cache.get_or_embed(model, text, embed_query)
+    
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts in one request, skipping the cached ones."""
+        model = self.embeddings.model
+        
+        async def embed_documents(texts: List[str]) -> List[List[float]]:
+            return await self.embedding_scheduler.run(
+                ("documents", model, tuple(texts)), None, lambda: self.embeddings.aembed_documents(texts)
+            )
+        
+        return await self.embedding_cache.get_or_embed_many(model, texts, embed_documents)
+    
+    async def _generate(self, messages: List, key: Optional[Hashable], user_id: Optional[str], llm=None,
+                        scheduler: Optional[LLMScheduler] = None) -> str:
+        """Run one completion through the scheduler; identical in-flight calls share it."""
+        llm = llm or self.llm
+        response = await (scheduler or self.llm_scheduler).run(key, user_id, lambda: llm.agenerate([messages]))
+        return response.generations[0][0].text
+    
+    def stats(self) -> Dict:
+        """Per-process counters for the AI path."""
+        return {
+            "embedding_cache": self.embedding_cache.stats(),
+            "memory_writer": self.memory_writer.stats(),
+            "response_cache": self.response_cache.stats(),
+            "vector_store": self.vector_store.stats(),
+            "llm_scheduler": self.llm_scheduler.stats(),
+            "embedding_scheduler": self.embedding_scheduler.stats(),
+            "caption_scheduler": self.caption_scheduler.stats(),
+            "context_tokens": {
+                "used": self.context_tokens_used,
+                "saved": self.context_tokens_saved,
+            },
+        }
+    
+    async def generate_summary(self, content: str, context: str = "", user_id: Optional[str] = None) -> Optional[str]:
+        """Generate an AI summary of the given content.
+        
+        Summaries are cached per user, so repeated content is answered
+        without another LLM call.
+        """
         if not self.llm:
             return None
         
         system_prompt = f"You are a helpful AI assistant for Nucleus, a life operating system. {context}"
+        
+        cached = await self.response_cache.get(user_id, "summary", content, system_prompt, self.llm.model_name)
+        if cached is not None:
+            return cached
+        
+        from langchain.schema import HumanMessage, SystemMessage
+        
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Please provide a concise summary of the following:\n\n{content}")
         ]
         
         try:
-            response = await self.llm.agenerate([messages])
-            return response.generations[0][0].text
+            summary = await self._generate(messages, ("summary", user_id, system_prompt, content), user_id)
+            await self.response_cache.set(user_id, "summary", content, system_prompt, self.llm.model_name, summary)
+            return summary
+        except SchedulerOverloaded:
+            raise
         except Exception as e:
             print(f"Error generating summary: {e}")
             return None
     
-    async def chat(self, user_message: str, system_context: str = "", user_id: str = None) -> Optional[str]:
-        """Have a conversation with the AI assistant."""
-        if not self.llm:
-            return "AI services are not configured."
+    async def caption_photo(self, details: str, image_url: Optional[str] = None) -> Optional[Dict]:
+        """Caption and tag one photo as {"caption": str, "tags": [str]}.
+        
+        image_url may be an http(s) URL or a data URL; without one the
+        caption is inferred from details (file name, description, place).
+        Returns None when AI is not configured; API errors are raised so the
+        caller can leave the photo for a later retry. Runs under
+        caption_scheduler, apart from the chat and summary calls.
+        """
+        if not self.vision_llm:
+            return None
         
-        # Retrieve relevant context from vector memory
-        relevant_context = await self.retrieve_context(user_message, user_id)
+        from langchain.schema import HumanMessage, SystemMessage
         
-        context_str = "\n".join(relevant_context) if relevant_context else ""
+        content = [{"type": "text", "text": f"Photo details:\n{details}"}]
+        if image_url:
+            content.append({"type": "image_url", "image_url": {"url": image_url, "detail": "low"}})
+        messages = [SystemMessage(content=PHOTO_CAPTION_PROMPT), HumanMessage(content=content)]
+        
+        text = await self._generate(messages, None, None, llm=self.vision_llm, scheduler=self.caption_scheduler)
+        return parse_photo_caption(text)
+    
+    async def _chat_messages(self, user_message: str, system_context: str, user_id: Optional[str]) -> List:
+        """Build the chat prompt, enriched with relevant vector memory."""
+        from langchain.schema import HumanMessage, SystemMessage
+        
+        memories = await self.retrieve_memories(user_message, user_id, limit=settings.AI_CONTEXT_MAX_MEMORIES)
+        
+        # Fit the most relevant, de-duplicated memories into the token budget
+        context = assemble_context(memories)
+        self.context_tokens_used += context.tokens_used
+        self.context_tokens_saved += context.tokens_saved
+        
+        context_str = context.text
         full_context = f"{system_context}\n\nRelevant context:\n{context_str}" if context_str else system_context
         
-        messages = [
+        return [
             SystemMessage(content=f"You are Nucleus AI, an intelligent assistant that helps manage the user's life. {full_context}"),
             HumanMessage(content=user_message)
         ]
+    
+    async def chat(self, user_message: str, system_context: str = "", user_id: str = None) -> Optional[str]:
+        """Have a conversation with the AI assistant."""
+        if not self.llm:
+            return "AI services are not configured."
+        
+        messages = await self._chat_messages(user_message, system_context, user_id)
+        
+        # The system prompt carries the retrieved memories, so a cached answer
+        # is only reused while the user's relevant context is unchanged.
+        system_prompt = messages[0].content
+        cached = await self.response_cache.get(user_id, "chat", user_message, system_prompt, self.llm.model_name)
+        if cached is not None:
+            return cached
         
         try:
-            response = await self.llm.agenerate([messages])
-            answer = response.generations[0][0].text
+            answer = await self._generate(messages, ("chat", user_id, system_prompt, user_message), user_id)
+            await self.response_cache.set(user_id, "chat", user_message, system_prompt, self.llm.model_name, answer)
             
-            # Store the interaction in vector memory
+            # Queue the interaction for vector memory; written in the background
             if user_id:
-                await self.store_memory(f"User: {user_message}\nAssistant: {answer}", user_id)
+                await self.memory_writer.enqueue(f"User: {user_message}\nAssistant: {answer}", user_id)
             
             return answer
+        except SchedulerOverloaded:
+            raise
         except Exception as e:
             print(f"Error in chat: {e}")
             return "I apologize, but I encountered an error processing your request."
     
+    async def stream_chat(self, user_message: str, system_context: str = "", user_id: str = None) -> AsyncIterator[str]:
+        """Stream the assistant's answer token by token.
+        
+        The interaction is only persisted to vector memory once the full answer
+        has been streamed; an aborted stream stores nothing.
+        """
+        if not self.llm:
+            yield "AI services are not configured."
+            return
+        
+        messages = await self._chat_messages(user_message, system_context, user_id)
+        
+        tokens = []
+        try:
+            async with self.llm_scheduler.slot(user_id):
+                async for chunk in self.llm.astream(messages):
+                    if chunk.content:
+                        tokens.append(chunk.content)
+                        yield chunk.content
+        except SchedulerOverloaded:
+            yield "The AI assistant is busy right now, please try again in a moment."
+            return
+        except Exception as e:
+            print(f"Error in streaming chat: {e}")
+            yield "I apologize, but I encountered an error processing your request."
+            return
+        
+        if user_id and tokens:
+            answer = "".join(tokens)
+            await self.memory_writer.enqueue(f"User: {user_message}\nAssistant: {answer}", user_id)
+    
     async def store_memory(self, content: str, user_id: str, metadata: Optional[Dict] = None):
         """Store content in vector memory for later retrieval."""
-        if not self.embeddings:
+        try:
+            await self.store_memories([{"content": content, "user_id": user_id, "metadata": metadata}])
+        except Exception as e:
+            print(f"Error storing memory: {e}")
+    
+    async def store_memories(self, items: List[Dict]):
+        """Embed and upsert a batch of memories in one call each.
+        
+        Each item has "content", "user_id" and optional "metadata". Errors are
+        raised so the write-behind queue can retry the batch.
+        """
+        if not self.embeddings or not items:
             return
         
-        try:
-            embedding = await self.embeddings.aembed_query(content)
-            
+        embeddings = await self.embed_many([item["content"] for item in items])
+        
+        points = []
+        for item, embedding in zip(items, embeddings):
             payload = {
-                "content": content,
-                "user_id": user_id,
+                "content": item["content"],
+                "user_id": item["user_id"],
                 "timestamp": str(uuid.uuid4()),
-                **(metadata or {})
+                **(item.get("metadata") or {})
             }
-            
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
-                payload=payload
-            )
-            
-            self.qdrant_client.upsert(
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                points=[point]
-            )
-        except Exception as e:
-            print(f"Error storing memory: {e}")
+            points.append({
+                "id": str(uuid.uuid4()),
+                "vector": embedding,
+                "payload": payload
+            })
+        
+        await self.vector_store.upsert(points)
     
-    async def retrieve_context(self, query: str, user_id: Optional[str] = None, limit: int = 5) -> List[str]:
-        """Retrieve relevant context from vector memory."""
+    async def retrieve_memories(self, query: str, user_id: Optional[str] = None, limit: int = 5) -> List[VectorHit]:
+        """Retrieve relevant memories with their similarity scores."""
         if not self.embeddings:
             return []
         
         try:
-            query_embedding = await self.embeddings.aembed_query(query)
-            
-            search_filter = None
-            if user_id:
-                search_filter = {"must": [{"key": "user_id", "match": {"value": user_id}}]}
-            
-            results = self.qdrant_client.search(
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                query_vector=query_embedding,
-                limit=limit,
-                query_filter=search_filter
-            )
-            
-            return [result.payload.get("content", "") for result in results]
+            query_embedding = await self.embed(query)
+            return await self.vector_store.search(query_embedding, user_id, limit)
         except Exception as e:
             print(f"Error retrieving context: {e}")
             return []
+    
+    async def search_photos(self, query: str, user_id: str, limit: int = 20) -> List[VectorHit]:
+        """Photos whose caption and tags best match query, best first."""
+        if not self.embeddings:
+            return []
+        
+        try:
+            query_embedding = await self.embed(query)
+            return await self.photo_vectors.search(query_embedding, user_id, limit)
+        except Exception as e:
+            print(f"Error searching photos: {e}")
+            return []
+    
+    async def retrieve_context(self, query: str, user_id: Optional[str] = None, limit: int = 5) -> List[str]:
+        """Retrieve relevant context from vector memory."""
+        results = await self.retrieve_memories(query, user_id, limit)
+        return [result.payload.get("content", "") for result in results]
+
+def parse_photo_caption(text: str) -> Dict:
+    """Parse the caption model's JSON reply, tolerating code fences and plain text."""
+    raw = text.strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        if raw.startswith("json"):
+            raw = raw[4:]
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return {"caption": text.strip(), "tags": []}
+    
+    tags = []
+    for tag in data.get("tags") or []:
+        if isinstance(tag, str) and tag.strip() and tag.strip().lower() not in tags:
+            tags.append(tag.strip().lower())
+    return {"caption": str(data.get("caption") or "").strip(), "tags": tags[:MAX_PHOTO_TAGS]}
 
 # Global AI client instance
 ai_client = AIClient()
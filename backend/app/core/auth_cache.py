@@ -0,0 +1,169 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+import orjson
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+class CachedUser(NamedTuple):
+    """The fields of a user that authenticated requests need, detached from any session."""
+    id: str
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    created_at: datetime
+    
+    @classmethod
+    def from_model(cls, user) -> "CachedUser":
+        return cls(user.id, user.email, user.full_name, bool(user.is_active),
+                   bool(user.is_superuser), user.created_at)
+    
+    def dumps(self) -> bytes:
+        return orjson.dumps(self._asdict())
+    
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedUser":
+        data = orjson.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+class AuthCache:
+    """Caches verified token payloads and user records for request authentication.
+    
+    Token payloads stay in-process only: re-verifying an HS256 signature is
+    about as cheap as a Redis round trip. They are kept until the earlier of
+    the token's own exp and AUTH_TOKEN_CACHE_TTL_SECONDS.
+    
+    Users live in an in-process LRU in front of Redis. invalidate_user()
+    clears this process's entry and the shared Redis entry; other workers
+    pick the change up once their local entry expires, so
+    AUTH_USER_CACHE_TTL_SECONDS bounds how long a deactivated user can keep
+    using an existing token there.
+    """
+    
+    def __init__(self, max_tokens: int = settings.AUTH_TOKEN_CACHE_SIZE,
+                 token_ttl_seconds: float = settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+                 max_users: int = settings.AUTH_USER_CACHE_SIZE,
+                 user_ttl_seconds: float = settings.AUTH_USER_CACHE_TTL_SECONDS,
+                 redis_ttl_seconds: int = settings.AUTH_USER_REDIS_TTL_SECONDS):
+        self.max_tokens = max_tokens
+        self.token_ttl_seconds = token_ttl_seconds
+        self.max_users = max_users
+        self.user_ttl_seconds = user_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._tokens: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._users: "OrderedDict[str, Tuple[float, CachedUser]]" = OrderedDict()
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_local_hits = 0
+        self.user_redis_hits = 0
+        self.user_misses = 0
+    
+    @staticmethod
+    def _user_key(user_id: str) -> str:
+        return f"auth:user:{user_id}"
+    
+    @staticmethod
+    def _remember(entries: OrderedDict, max_entries: int, key: str, expires_at: float, value):
+        entries[key] = (expires_at, value)
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+    
+    @staticmethod
+    def _lookup(entries: OrderedDict, key: str):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return value
+    
+    def decode(self, token: str, decode: Callable[[str], Dict]) -> Dict:
+        """Return the payload of token, verifying it with decode() on a miss.
+        
+        decode() raises for invalid tokens, so only valid ones are cached.
+        """
+        payload = self._lookup(self._tokens, token)
+        if payload is not None:
+            self.token_hits += 1
+            return payload
+        
+        self.token_misses += 1
+        payload = decode(token)
+        expires_at = time.time() + self.token_ttl_seconds
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        self._remember(self._tokens, self.max_tokens, token, expires_at, payload)
+        return payload
+    
+    async def get_user(self, user_id: str,
+                       load: Callable[[str], Awaitable[Optional[CachedUser]]]) -> Optional[CachedUser]:
+        """Look a user up locally, then in Redis, then through load() (the database)."""
+        user = self._lookup(self._users, user_id)
+        if user is not None:
+            self.user_local_hits += 1
+            return user
+        
+        key = self._user_key(user_id)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(key)
+            except Exception as e:
+                mark_redis_unavailable(e)
+                raw = None
+            if raw is not None:
+                user = CachedUser.loads(raw)
+                self._remember(self._users, self.max_users, user_id, time.time() + self.user_ttl_seconds, user)
+                self.user_redis_hits += 1
+                return user
+        
+        self.user_misses += 1
+        user = await load(user_id)
+        if user is not None:
+            await self.set_user(user)
+        return user
+    
+    async def set_user(self, user: CachedUser):
+        self._remember(self._users, self.max_users, user.id, time.time() + self.user_ttl_seconds, user)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(self._user_key(user.id), user.dumps(), ex=self.redis_ttl_seconds)
+        except Exception as e:
+            mark_redis_unavailable(e)
+    
+    async def invalidate_user(self, user_id: str):
+        """Drop a user after it changed or was deactivated, locally and in Redis."""
+        self._users.pop(user_id, None)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._user_key(user_id))
+        except Exception as e:
+            mark_redis_unavailable(e)
+    
+    def stats(self) -> Dict:
+        user_lookups = self.user_local_hits + self.user_redis_hits + self.user_misses
+        token_lookups = self.token_hits + self.token_misses
+        return {
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+            "token_hit_rate": self.token_hits / token_lookups if token_lookups else 0.0,
+            "user_local_hits": self.user_local_hits,
+            "user_redis_hits": self.user_redis_hits,
+            "user_misses": self.user_misses,
+            "user_hit_rate": (self.user_local_hits + self.user_redis_hits) / user_lookups if user_lookups else 0.0,
+            "local_tokens": len(self._tokens),
+            "local_users": len(self._users),
+        }
+
+auth_cache = AuthCache()
@@ -0,0 +1,16 @@
+from typing import Any, Dict, List, Sequence, Tuple, Type
+from pydantic import BaseModel, ValidationError
+
+def batch_error(index: int, error: str, id: str = None) -> Dict:
+    return {"index": index, "id": id, "error": error}
+
+def validate_items(raw_items: Sequence[Any], schema: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[Dict]]:
+    """Validate each item on its own so one bad item does not reject the batch."""
+    valid, errors = [], []
+    for index, raw in enumerate(raw_items):
+        try:
+            valid.append((index, schema.model_validate(raw)))
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            errors.append(batch_error(index, message, raw.get("id") if isinstance(raw, dict) else None))
+    return valid, errors
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.models.budget import Budget, MonthlyTotal, Transaction, TransactionType
+
+# Rollup rows need a non-null category to be part of the primary key
+UNCATEGORIZED = ""
+
+def period(day: date) -> Tuple[str, str]:
+    """The ("2024", "01") year and month strings used by Budget and the rollups."""
+    return f"{day.year:04d}", f"{day.month:02d}"
+
+def previous_periods(year: int, month: int, count: int) -> List[Tuple[str, str]]:
+    """count consecutive months ending at year/month, oldest first."""
+    index = year * 12 + month - 1
+    return [period(date(i // 12, i % 12 + 1, 1)) for i in range(index - count + 1, index + 1)]
+
+async def apply_transactions(db, transactions: Iterable[Transaction]):
+    """Add transactions to the monthly totals within the caller's DB transaction.
+    
+    Amounts are aggregated per rollup row first, so a batch costs one
+    upsert statement however many transactions it holds. The upsert's
+    ROW EXCLUSIVE lock on the rollup table is what rebuild() waits on.
+    """
+    deltas: Dict[tuple, List] = defaultdict(lambda: [0.0, 0])
+    for transaction in transactions:
+        key = (
+            transaction.user_id,
+            *period(transaction.date),
+            transaction.category or UNCATEGORIZED,
+            TransactionType(transaction.type)
+        )
+        deltas[key][0] += transaction.amount
+        deltas[key][1] += 1
+    
+    if not deltas:
+        return
+    
+    now = datetime.utcnow()
+    # Sorted keys take row locks in a consistent order across writers
+    stmt = insert(MonthlyTotal).values([
+        {"user_id": user_id, "year": year, "month": month, "category": category,
+         "type": type_, "total": total, "count": count, "updated_at": now}
+        for (user_id, year, month, category, type_), (total, count) in sorted(deltas.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyTotal.user_id, MonthlyTotal.year, MonthlyTotal.month,
+                        MonthlyTotal.category, MonthlyTotal.type],
+        set_={
+            "total": MonthlyTotal.total + stmt.excluded.total,
+            "count": MonthlyTotal.count + stmt.excluded.count,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    await db.execute(stmt)
+
+async def rebuild(db, user_id: Optional[str] = None) -> int:
+    """Recompute the monthly totals from transactions, for one user or everyone.
+    
+    Returns the number of rollup rows written; the caller commits.
+    
+    The rollup table is locked in SHARE ROW EXCLUSIVE mode for the rest of
+    the caller's transaction. That waits for writers that already applied
+    transactions to commit (so the rebuild reads them) and holds new ones
+    back until the rebuild commits (so they add to the rebuilt totals),
+    and no transaction is lost or counted twice. Reads are not blocked.
+    """
+    await db.execute(text(f"LOCK TABLE {MonthlyTotal.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    
+    year = func.to_char(Transaction.date, "YYYY")
+    month = func.to_char(Transaction.date, "MM")
+    category = func.coalesce(Transaction.category, UNCATEGORIZED)
+    
+    totals = select(
+        Transaction.user_id, year, month, category, Transaction.type,
+        func.sum(Transaction.amount), func.count(), func.timezone("utc", func.now())
+    ).group_by(Transaction.user_id, year, month, category, Transaction.type)
+    
+    clear = delete(MonthlyTotal)
+    if user_id:
+        totals = totals.where(Transaction.user_id == user_id)
+        clear = clear.where(MonthlyTotal.user_id == user_id)
+    
+    await db.execute(clear)
+    result = await db.execute(insert(MonthlyTotal).from_select(
+        ["user_id", "year", "month", "category", "type", "total", "count", "updated_at"],
+        totals
+    ))
+    return result.rowcount
+
+def _month_key(month: str) -> Optional[str]:
+    # Budgets are free-form strings; accept "1" as well as "01"
+    return f"{int(month):02d}" if month.strip().isdigit() else None
+
+async def budget_analytics(db, user_id: str, year: int, month: int, months: int) -> Dict:
+    """Spending against budgets for one month, with a trend over the months before it.
+    
+    Reads only rollup rows and budgets, so the cost grows with the number
+    of categories and months, not with the number of transactions.
+    """
+    periods = previous_periods(year, month, months)
+    current = periods[-1]
+    
+    result = await db.execute(
+        select(MonthlyTotal.year, MonthlyTotal.month, MonthlyTotal.category, MonthlyTotal.type,
+               MonthlyTotal.total, MonthlyTotal.count)
+        .where(
+            MonthlyTotal.user_id == user_id,
+            tuple_(MonthlyTotal.year, MonthlyTotal.month) >= periods[0],
+            tuple_(MonthlyTotal.year, MonthlyTotal.month) <= current
+        )
+    )
+    spent: Dict[Tuple[str, Tuple[str, str]], float] = defaultdict(float)
+    income: Dict[Tuple[str, str], float] = defaultdict(float)
+    expenses: Dict[Tuple[str, str], float] = defaultdict(float)
+    counts: Dict[str, int] = defaultdict(int)
+    for row in result:
+        key = (row.year, row.month)
+        if row.type == TransactionType.INCOME:
+            income[key] += row.total
+            continue
+        spent[(row.category, key)] += row.total
+        expenses[key] += row.total
+        if key == current:
+            counts[row.category] += row.count
+    
+    budgets = await db.execute(
+        select(Budget.category, Budget.month, Budget.monthly_limit)
+        .where(Budget.user_id == user_id, Budget.year == current[0])
+    )
+    limits: Dict[str, float] = {}
+    for row in budgets:
+        if _month_key(row.month) == current[1]:
+            limits[row.category] = limits.get(row.category, 0.0) + row.monthly_limit
+    
+    categories = sorted({category for category, key in spent if key == current} | set(limits))
+    rows = []
+    for category in categories:
+        category_spent = spent.get((category, current), 0.0)
+        limit = limits.get(category)
+        rows.append({
+            "category": category or None,
+            "limit": limit,
+            "spent": category_spent,
+            "remaining": limit - category_spent if limit is not None else None,
+            "percent_used": round(100 * category_spent / limit, 1) if limit else None,
+            "transaction_count": counts.get(category, 0),
+            "trend": [spent.get((category, key), 0.0) for key in periods],
+        })
+    
+    budgeted = sum(limits.values())
+    total_spent = expenses.get(current, 0.0)
+    return {
+        "year": current[0],
+        "month": current[1],
+        "categories": rows,
+        "total_spent": total_spent,
+        "total_income": income.get(current, 0.0),
+        "total_budgeted": budgeted,
+        "total_remaining": budgeted - sum(row["spent"] for row in rows if row["limit"] is not None),
+        "trend": [
+            {"year": key[0], "month": key[1], "spent": expenses.get(key, 0.0), "income": income.get(key, 0.0)}
+            for key in periods
+        ],
+    }
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy import select
+from app.models.collection_version import CollectionVersion
+
+async def current(db, user_id: str, collection: str) -> int:
+    result = await db.execute(
+        select(CollectionVersion.version)
+        .where(CollectionVersion.user_id == user_id, CollectionVersion.collection == collection)
+    )
+    return result.scalar_one_or_none() or 0
+
+def etag(user_id: str, collection: str, version: int, request: Request) -> str:
+    """Strong ETag of one list response: the collection version plus the query (filters, cursor, limit)."""
+    digest = hashlib.sha256(f"{user_id}\0{collection}\0{version}\0{request.url.query}".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+def matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether If-None-Match names tag, in any of its encoded variants (see FastJSONResponse)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.split("-", 1)[0].strip('"') == tag.strip('"'):
+            return True
+    return False
+
+def conditional_headers(tag: str) -> dict:
+    return {"ETag": tag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+
+def not_modified_response(request: Request, tag: str) -> Optional[Response]:
+    """A 304 for tag if the request's If-None-Match names it, else None."""
+    if matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=conditional_headers(tag))
+    return None
+
+async def not_modified(db, user_id: str, collection: str, request: Request, response: Response) -> Optional[Response]:
+    """Answer a list GET with 304 when the client's copy is current.
+    
+    Otherwise sets the ETag on response and returns None. The version is
+    read before the rows, so a write racing the page only makes the ETag
+    older than the content, never newer.
+    """
+    tag = etag(user_id, collection, await current(db, user_id, collection), request)
+    cached = not_modified_response(request, tag)
+    if cached is None:
+        response.headers.update(conditional_headers(tag))
+    return cached
@@ -15,14 +15,138 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Reject tokens of deactivated or deleted users (checked through the auth cache)
+    AUTH_ENFORCE_ACTIVE: bool = True
+    
+    # Auth cache: verified tokens in-process, users in-process in front of Redis
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 300.0  # never beyond the token's own exp
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: float = 30.0  # how stale other workers may be after a change
+    AUTH_USER_REDIS_TTL_SECONDS: int = 600
+    
+    # Password hashing (bcrypt, run in a thread pool off the event loop)
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # hashes with other costs are replaced on login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # queued + running before login/register get 503
+    
+    # Login/register throttling, per fixed window
+    AUTH_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    AUTH_RATE_LIMIT_PER_IP: int = 30
+    AUTH_RATE_LIMIT_PER_EMAIL: int = 10
+    # Header carrying the client address when behind a trusted proxy (e.g. X-Real-IP)
+    AUTH_CLIENT_IP_HEADER: Optional[str] = None
+    
+    # Pagination for list endpoints
+    PAGE_DEFAULT_LIMIT: int = 100
+    PAGE_MAX_LIMIT: int = 500
+    
+    # List responses: encode selected columns with orjson instead of
+    # validating ORM objects through the response models
+    FAST_JSON_RESPONSES: bool = True
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    
+    # Read-through Redis cache of per-user GET responses (needs REDIS_URL)
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    QUERY_CACHE_LOCK_SECONDS: float = 5.0  # max time one worker holds a fill lock
+    QUERY_CACHE_LOCK_WAIT_SECONDS: float = 0.5  # wait for another worker's fill, then load anyway
+    
+    # Batch endpoints
+    BATCH_MAX_ITEMS: int = 500
+    
+    # Bulk transaction import
+    IMPORT_CHUNK_SIZE: int = 1000  # rows validated and written per batch
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
     
     # AI Services
     OPENAI_API_KEY: Optional[str] = None
     QDRANT_URL: str = "http://qdrant:6333"
     QDRANT_COLLECTION_NAME: str = "nucleus_memory"
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_TIMEOUT: float = 5.0  # seconds, applied per vector call
+    QDRANT_MAX_CONNECTIONS: int = 20
+    QDRANT_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    # Collection layout (applied when a collection is created or migrated)
+    QDRANT_SCALAR_QUANTIZATION: bool = True  # int8 copy of vectors kept in RAM
+    QDRANT_VECTORS_ON_DISK: bool = False  # keep full-precision originals on disk
+    
+    # Vector memory backend: "qdrant", "local" (in-process only, for tests and
+    # benchmarks) or "hybrid" (in-process fast path backed by Qdrant)
+    VECTOR_STORE: str = "qdrant"
+    LOCAL_VECTOR_MAX_POINTS: int = 20000  # across all resident users
+    LOCAL_VECTOR_MAX_USER_POINTS: int = 2000  # larger users are searched in Qdrant
+    LOCAL_VECTOR_MAX_USERS: int = 10000
+    LOCAL_VECTOR_TTL_SECONDS: float = 300.0  # reload resident users from Qdrant
+    
+    # Chat context assembly
+    AI_CONTEXT_MAX_MEMORIES: int = 8  # memories retrieved per chat message
+    AI_CONTEXT_TOKEN_BUDGET: int = 1500  # tokens of memory allowed in the prompt
+    AI_CONTEXT_MIN_MEMORY_TOKENS: int = 32  # don't add memory fragments shorter than this
+    AI_CONTEXT_DEDUPE_THRESHOLD: float = 0.8  # Jaccard similarity treated as a duplicate
+    
+    # Outbound model call scheduling
+    LLM_MAX_CONCURRENCY: int = 16  # concurrent chat/summary calls per worker
+    LLM_PER_USER_CONCURRENCY: int = 2
+    LLM_TIMEOUT_SECONDS: float = 60.0  # per attempt
+    EMBEDDING_MAX_CONCURRENCY: int = 32
+    EMBEDDING_TIMEOUT_SECONDS: float = 20.0
+    LLM_MAX_QUEUE: int = 200  # calls waiting for a slot before new ones are rejected
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5  # seconds, doubled per attempt with full jitter
+    
+    # Embedding cache (in-process LRU in front of Redis)
+    EMBEDDING_CACHE_SIZE: int = 2048  # entries kept in-process
+    EMBEDDING_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # Redis tier expiry
+    
+    # Write-behind vector memory
+    MEMORY_WRITE_BATCH_SIZE: int = 32
+    MEMORY_WRITE_FLUSH_SECONDS: float = 1.0
+    MEMORY_WRITE_QUEUE_SIZE: int = 1000  # pending writes held in memory
+    MEMORY_WRITE_ENQUEUE_TIMEOUT: float = 0.5  # wait this long for room, then drop
+    MEMORY_WRITE_MAX_RETRIES: int = 2
+    MEMORY_WRITE_DRAIN_SECONDS: float = 10.0
+    
+    # Photo storage: uploads are content-addressed by sha256 under this directory
+    PHOTO_STORAGE_DIR: str = "/app/data/photos"  # local file_paths are resolved inside it
+    PHOTO_UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024
+    PHOTO_THUMBNAIL_SIZE: int = 320  # longest side, pixels
+    PHOTO_WEB_SIZE: int = 1600
+    PHOTO_RENDITION_QUALITY: int = 85  # JPEG quality of thumbnails and web renditions
+    PHOTO_MAX_PIXELS: int = 100_000_000  # larger images are rejected (decompression bombs)
+    PHOTO_EXIF_MAX_BYTES: int = 256 * 1024  # header bytes searched for EXIF metadata
+    # Renditions are made in a process pool, bounded like password hashing
+    PHOTO_PROCESS_WORKERS: int = 2
+    PHOTO_PROCESS_MAX_PENDING: int = 16  # queued + running before uploads get 503
+    PHOTO_PROCESS_TASKS_PER_CHILD: int = 200  # recycle workers to return decoder memory
+    # Near-duplicate detection on perceptual hashes
+    PHOTO_DUPLICATE_MAX_DISTANCE: int = 6  # differing bits (of 64) still counted as the same picture
+    PHOTO_DUPLICATE_INDEX_USERS: int = 1000  # users whose Hamming hash tables are kept in memory
+    
+    # Background photo captioning and tagging
+    PHOTO_CAPTION_ENABLED: bool = True
+    PHOTO_CAPTION_MODEL: str = "gpt-4-vision-preview"
+    PHOTO_CAPTION_MAX_TOKENS: int = 300
+    PHOTO_CAPTION_BATCH_SIZE: int = 16
+    PHOTO_CAPTION_FLUSH_SECONDS: float = 2.0
+    PHOTO_CAPTION_QUEUE_SIZE: int = 1000  # photo ids held in memory; the backfill command catches the rest
+    PHOTO_CAPTION_CONCURRENCY: int = 4  # captions in flight per worker, on top of LLM_MAX_CONCURRENCY
+    PHOTO_CAPTION_MAX_RETRIES: int = 2  # per batch write-back
+    PHOTO_CAPTION_MAX_IMAGE_BYTES: int = 4 * 1024 * 1024  # larger local files are captioned from metadata
+    PHOTO_CAPTION_DRAIN_SECONDS: float = 10.0
+    QDRANT_PHOTO_COLLECTION_NAME: str = "nucleus_photos"
+    
+    # LLM response cache
+    RESPONSE_CACHE_SIZE: int = 1024  # entries kept in-process
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    # Cosine similarity for near-duplicate hits; None disables the semantic lookup
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD: Optional[float] = None
+    QDRANT_RESPONSE_CACHE_COLLECTION: str = "nucleus_response_cache"
     
     # Redis (optional)
     REDIS_URL: Optional[str] = "redis://redis:6379/0"
+    REDIS_TIMEOUT: float = 0.5  # seconds
+    REDIS_RETRY_AFTER_SECONDS: float = 30.0  # back-off after a failed call
     
     # CORS
     CORS_ORIGINS: List[str] = [
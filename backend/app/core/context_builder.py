@@ -0,0 +1,104 @@
+import re
+from typing import List, NamedTuple, Optional
+from app.core.config import settings
+from app.core.vector_store import VectorHit
+
+# Fallback when the tiktoken encoding is not loaded yet (or cannot be
+# downloaded): OpenAI models average roughly four characters per token.
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+def load_encoding(model: str):
+    """Load the tiktoken encoding for a model.
+    
+    tiktoken downloads the BPE ranks on first use, so this is called from the
+    AI client warm-up thread rather than on the request path.
+    """
+    global _encoding
+    try:
+        import tiktoken
+        
+        try:
+            _encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Error loading tiktoken encoding, approximating token counts: {e}")
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+class ContextBundle(NamedTuple):
+    text: str
+    tokens_used: int
+    tokens_saved: int
+    memories_used: int
+    memories_dropped: int
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def _is_near_duplicate(shingles: set, kept: List[set], threshold: float) -> bool:
+    for other in kept:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= threshold:
+            return True
+    return False
+
+def assemble_context(hits: List[VectorHit], budget_tokens: Optional[int] = None,
+                     dedupe_threshold: Optional[float] = None) -> ContextBundle:
+    """Pack retrieved memories into at most budget_tokens tokens.
+    
+    Memories are taken in descending relevance score. Near-identical ones
+    (word-trigram Jaccard similarity at or above dedupe_threshold) are
+    skipped, and the first memory that does not fit is truncated to the
+    remaining budget if enough of it is left to be useful.
+    """
+    budget = settings.AI_CONTEXT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    threshold = settings.AI_CONTEXT_DEDUPE_THRESHOLD if dedupe_threshold is None else dedupe_threshold
+    
+    parts: List[str] = []
+    kept_shingles: List[set] = []
+    tokens_retrieved = 0
+    tokens_used = 0
+    dropped = 0
+    
+    for hit in sorted(hits, key=lambda h: h.score, reverse=True):
+        content = (hit.payload.get("content") or "").strip()
+        if not content:
+            continue
+        tokens = count_tokens(content)
+        tokens_retrieved += tokens
+        
+        shingles = _shingles(content)
+        remaining = budget - tokens_used
+        if _is_near_duplicate(shingles, kept_shingles, threshold) or remaining < settings.AI_CONTEXT_MIN_MEMORY_TOKENS:
+            dropped += 1
+            continue
+        
+        if tokens > remaining:
+            content = truncate_tokens(content, remaining - 1) + "…"
+            tokens = count_tokens(content)
+        
+        parts.append(content)
+        kept_shingles.append(shingles)
+        tokens_used += tokens
+    
+    return ContextBundle(
+        text="\n".join(parts),
+        tokens_used=tokens_used,
+        tokens_saved=tokens_retrieved - tokens_used,
+        memories_used=len(parts),
+        memories_dropped=dropped,
+    )
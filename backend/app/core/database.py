@@ -1,3 +1,6 @@
+from pathlib import Path
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -27,3 +30,19 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+def _current_revisions(connection) -> set:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+async def check_schema_version():
+    """Fail fast unless the database is migrated to the latest revision."""
+    expected = set(ScriptDirectory(str(ALEMBIC_DIR)).get_heads())
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_current_revisions)
+    
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}. "
+            "Run `alembic upgrade head` from the backend directory."
+        )
@@ -0,0 +1,124 @@
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-process LRU in front of Redis.
+    
+    Keys are a hash of the embedding model name plus the exact text, so a
+    cached vector is only ever reused for identical input to the same model.
+    Vectors are kept as packed float32 to keep both tiers compact.
+    """
+    
+    def __init__(self, max_entries: int = settings.EMBEDDING_CACHE_SIZE,
+                 ttl_seconds: int = settings.EMBEDDING_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, array]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        digest = hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+        return f"emb:{digest}"
+    
+    def _remember(self, key: str, vector: array):
+        self._local[key] = vector
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+    
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Look a vector up in the local tier, then in Redis."""
+        return (await self.get_many(model, [text]))[0]
+    
+    async def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up several texts at once; Redis misses are fetched in one MGET."""
+        keys = [self.key(model, text) for text in texts]
+        found: Dict[str, array] = {}
+        
+        for key in keys:
+            vector = self._local.get(key)
+            if vector is not None:
+                self._local.move_to_end(key)
+                found[key] = vector
+                self.local_hits += 1
+        
+        remote_keys = list(dict.fromkeys(k for k in keys if k not in found))
+        redis = get_redis()
+        if remote_keys and redis is not None:
+            try:
+                raw_values = await redis.mget(remote_keys)
+            except Exception as e:
+                mark_redis_unavailable(e)
+                raw_values = [None] * len(remote_keys)
+            
+            for key, raw in zip(remote_keys, raw_values):
+                if raw is not None:
+                    vector = array("f")
+                    vector.frombytes(raw)
+                    self._remember(key, vector)
+                    found[key] = vector
+                    self.redis_hits += 1
+        
+        results = []
+        for key in keys:
+            vector = found.get(key)
+            if vector is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                results.append(vector.tolist())
+        return results
+    
+    async def set_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store vectors in both tiers."""
+        packed = {self.key(model, text): array("f", vector) for text, vector in zip(texts, vectors)}
+        for key, vector in packed.items():
+            self._remember(key, vector)
+        
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, vector in packed.items():
+                    pipe.set(key, vector.tobytes(), ex=self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            mark_redis_unavailable(e)
+    
+    async def get_or_embed(self, model: str, text: str,
+                           embed: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Return the cached vector for text, embedding and caching it on a miss."""
+        vector = await self.get(model, text)
+        if vector is None:
+            vector = await embed(text)
+            await self.set_many(model, [text], [vector])
+        return vector
+    
+    async def get_or_embed_many(self, model: str, texts: List[str],
+                                embed_many: Callable[[List[str]], Awaitable[List[List[float]]]]) -> List[List[float]]:
+        """Batch variant of get_or_embed: only the misses go to the embedding model."""
+        vectors = await self.get_many(model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            embedded = dict(zip(missing, await embed_many(missing)))
+            await self.set_many(model, missing, [embedded[t] for t in missing])
+            vectors = [v if v is not None else embedded[t] for t, v in zip(texts, vectors)]
+        return vectors
+    
+    def stats(self) -> Dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.redis_hits) / lookups if lookups else 0.0,
+            "local_entries": len(self._local),
+        }
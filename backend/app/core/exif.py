@@ -0,0 +1,141 @@
+"""Minimal EXIF reader for the fields photos store: capture time, GPS position and camera.
+
+Only the metadata at the start of the file is read (at most max_bytes),
+never the image data, so it costs one small read even for large files.
+JPEG (APP1 segment) and TIFF-based files are supported; anything else,
+or anything malformed, yields {}.
+"""
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE = 1, 2, 3, 4
+
+# TIFF field type -> bytes per value
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+SOS, EOI, APP1 = 0xDA, 0xD9, 0xE1
+
+def _exif_block(f, max_bytes: int) -> Optional[bytes]:
+    """The TIFF structure holding the EXIF data, read from the file header."""
+    head = f.read(4)
+    if head in (b"II*\x00", b"MM\x00*"):
+        return head + f.read(max_bytes - 4)
+    if head[:2] != b"\xff\xd8":
+        return None
+    
+    # Walk the JPEG marker segments up to the image data
+    position = 2
+    f.seek(position)
+    while position < max_bytes:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF or marker[1] in (SOS, EOI):
+            return None
+        length = struct.unpack(">H", marker[2:])[0]
+        if marker[1] == APP1:
+            data = f.read(length - 2)
+            if data.startswith(b"Exif\x00\x00"):
+                return data[6:]
+        else:
+            f.seek(length - 2, 1)
+        position += 2 + length
+    return None
+
+def _decode(order: str, field_type: int, count: int, raw: bytes):
+    if field_type == 2:
+        return raw.split(b"\x00", 1)[0].decode("ascii", "replace").strip()
+    if field_type == 3:
+        return struct.unpack(f"{order}{count}H", raw)
+    if field_type in (4, 9):
+        return struct.unpack(f"{order}{count}{'I' if field_type == 4 else 'i'}", raw)
+    if field_type in (5, 10):
+        parts = struct.unpack(f"{order}{count * 2}{'I' if field_type == 5 else 'i'}", raw)
+        return tuple(parts[i] / parts[i + 1] if parts[i + 1] else 0.0 for i in range(0, len(parts), 2))
+    return raw
+
+def _read_ifd(data: bytes, order: str, offset: int) -> Dict[int, object]:
+    """Tag -> decoded value for one image file directory."""
+    values = {}
+    if not 0 < offset <= len(data) - 2:
+        return values
+    count = struct.unpack(f"{order}H", data[offset:offset + 2])[0]
+    for i in range(count):
+        entry = offset + 2 + 12 * i
+        if entry + 12 > len(data):
+            break
+        tag, field_type, n = struct.unpack(f"{order}HHI", data[entry:entry + 8])
+        size = TYPE_SIZES.get(field_type)
+        if size is None or n > 1024:
+            continue
+        total = size * n
+        value_offset = entry + 8 if total <= 4 else struct.unpack(f"{order}I", data[entry + 8:entry + 12])[0]
+        raw = data[value_offset:value_offset + total]
+        if len(raw) == total:
+            values[tag] = _decode(order, field_type, n, raw)
+    return values
+
+def _taken_at(value, offset) -> Optional[datetime]:
+    """EXIF "YYYY:MM:DD HH:MM:SS"; converted to naive UTC when the offset is recorded."""
+    try:
+        taken = datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+    if isinstance(offset, str):
+        try:
+            aware = taken.replace(tzinfo=datetime.strptime(offset, "%z").tzinfo)
+            return aware.astimezone(timezone.utc).replace(tzinfo=None)
+        except ValueError:
+            pass
+    # Without an offset the camera's local time is kept as is
+    return taken
+
+def _degrees(value, ref) -> Optional[float]:
+    if not isinstance(value, tuple) or len(value) != 3:
+        return None
+    degrees = value[0] + value[1] / 60 + value[2] / 3600
+    return -degrees if ref in ("S", "W") else degrees
+
+def read_metadata(path: str, max_bytes: int = 256 * 1024) -> Dict:
+    """taken_at, latitude/longitude and camera found in a file's EXIF header (only those present)."""
+    try:
+        with open(path, "rb") as f:
+            block = _exif_block(f, max_bytes)
+    except OSError:
+        return {}
+    if not block or block[:2] not in (b"II", b"MM"):
+        return {}
+    
+    order = "<" if block[:2] == b"II" else ">"
+    try:
+        ifd0 = _read_ifd(block, order, struct.unpack(f"{order}I", block[4:8])[0])
+        exif = _read_ifd(block, order, ifd0[TAG_EXIF_IFD][0]) if TAG_EXIF_IFD in ifd0 else {}
+        gps = _read_ifd(block, order, ifd0[TAG_GPS_IFD][0]) if TAG_GPS_IFD in ifd0 else {}
+    except (struct.error, ValueError, IndexError, TypeError):
+        return {}
+    
+    metadata = {}
+    taken_at = _taken_at(exif.get(TAG_DATETIME_ORIGINAL) or ifd0.get(TAG_DATETIME), exif.get(TAG_OFFSET_TIME_ORIGINAL))
+    if taken_at is not None:
+        metadata["taken_at"] = taken_at
+    
+    latitude = _degrees(gps.get(GPS_LATITUDE), gps.get(GPS_LATITUDE_REF))
+    longitude = _degrees(gps.get(GPS_LONGITUDE), gps.get(GPS_LONGITUDE_REF))
+    # Cameras without a fix often write 0/0
+    if latitude is not None and longitude is not None and (latitude, longitude) != (0.0, 0.0) \
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        metadata["latitude"] = latitude
+        metadata["longitude"] = longitude
+    
+    make, model = ifd0.get(TAG_MAKE), ifd0.get(TAG_MODEL)
+    make = make if isinstance(make, str) else ""
+    model = model if isinstance(model, str) else ""
+    camera = model if model.lower().startswith(make.lower()) else f"{make} {model}".strip()
+    if camera:
+        metadata["camera"] = camera
+    return metadata
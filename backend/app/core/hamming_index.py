@@ -0,0 +1,105 @@
+"""Multi-index hash table over 64-bit perceptual hashes, for near-duplicate lookups.
+
+Pure Python with no app imports, so clusters() can also run in the photo
+process pool.
+"""
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Hashable, List, Tuple
+
+CHUNKS = 4
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance: the number of differing bits."""
+    return (a ^ b).bit_count()
+
+def _chunks(value: int) -> List[int]:
+    return [(value >> (CHUNK_BITS * i)) & CHUNK_MASK for i in range(CHUNKS)]
+
+@lru_cache(maxsize=None)
+def _flips(radius: int) -> Tuple[int, ...]:
+    """XOR masks reaching every chunk value within radius bits."""
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for k in range(radius + 1) for bits in combinations(range(CHUNK_BITS), k)
+    )
+
+class HammingIndex:
+    """Hashes split into four 16-bit chunks, with one table per chunk.
+    
+    Two hashes within distance r differ by at most r // 4 bits in at least
+    one chunk, so a search only probes the buckets near each of the query's
+    chunks and compares the few hashes found there, instead of scanning
+    every hash. Probing stays cheap for r < 8 (one or 17 buckets per chunk);
+    beyond that the number of buckets grows quickly.
+    """
+    
+    def __init__(self):
+        self._tables: List[Dict[int, List[Hashable]]] = [{} for _ in range(CHUNKS)]
+        self.hashes: Dict[Hashable, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.hashes)
+    
+    def add(self, item: Hashable, value: int):
+        """Index item under value; items already indexed are kept as they are."""
+        if item in self.hashes:
+            return
+        self.hashes[item] = value
+        for table, chunk in zip(self._tables, _chunks(value)):
+            table.setdefault(chunk, []).append(item)
+    
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Hashable]]:
+        """(distance, item) for every item within max_distance of value, closest first."""
+        flips = _flips(max_distance // CHUNKS)
+        candidates = set()
+        for table, chunk in zip(self._tables, _chunks(value)):
+            for flip in flips:
+                bucket = table.get(chunk ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        found = []
+        for item in candidates:
+            d = (value ^ self.hashes[item]).bit_count()
+            if d <= max_distance:
+                found.append((d, item))
+        found.sort(key=lambda hit: hit[0])
+        return found
+
+def clusters(items: List[Tuple[Hashable, int]], max_distance: int) -> List[List[Hashable]]:
+    """Group (item, hash) pairs into clusters of near-duplicates, largest first.
+    
+    Two items are linked when their hashes are within max_distance;
+    clusters are the connected groups (so a chain of small edits ends up
+    in one cluster). One index search per distinct hash instead of
+    comparing every pair. Items without a near-duplicate are left out.
+    """
+    by_hash: Dict[int, List[Hashable]] = {}
+    for item, value in items:
+        by_hash.setdefault(value, []).append(item)
+    index = HammingIndex()
+    for value in by_hash:
+        index.add(value, value)
+    
+    parent: Dict[int, int] = {}
+    
+    def find(value):
+        root = parent.setdefault(value, value)
+        while root != parent[root]:
+            root = parent[root]
+        while value != root:
+            parent[value], value = root, parent[value]
+        return root
+    
+    for value in by_hash:
+        for _, other in index.search(value, max_distance):
+            a, b = find(value), find(other)
+            if a != b:
+                parent[b] = a
+    
+    groups: Dict[int, List[Hashable]] = {}
+    for value, members in by_hash.items():
+        groups.setdefault(find(value), []).extend(members)
+    return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
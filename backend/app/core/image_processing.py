@@ -0,0 +1,109 @@
+"""Image work that runs in the photo process pool.
+
+Functions here are called in child processes, so they only take and
+return plain values and import nothing from the app beyond the pure
+helpers they need.
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+from app.core import exif
+
+# Pillow format -> extension of the stored original
+EXTENSIONS = {"JPEG": ".jpg", "MPO": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp", "TIFF": ".tif", "BMP": ".bmp"}
+
+def make_renditions(source: str, targets: List[Tuple[str, int]], quality: int, max_pixels: int) -> Dict:
+    """Write JPEG renditions of source, each fitting a square of the given size.
+    
+    targets are (path, size) pairs; existing paths are skipped, so a file
+    already stored under its hash is not processed again. JPEGs are decoded
+    at a reduced scale when the renditions allow it, which keeps memory far
+    below a full-size decode. Returns the source format and dimensions, and
+    raises ValueError for anything Pillow cannot read as an image.
+    """
+    from PIL import Image, ImageOps
+    
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(source) as image:
+            info = {"format": image.format, "width": image.width, "height": image.height}
+            pending = sorted([(path, size) for path, size in targets if not os.path.exists(path)], key=lambda t: -t[1])
+            if not pending:
+                return info
+            
+            largest = pending[0][1]
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            # Largest first, each smaller rendition scaled down from the previous one
+            for path, size in pending:
+                image.thumbnail((size, size), Image.LANCZOS)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                image.save(tmp_path, "JPEG", quality=quality, optimize=True)
+                os.replace(tmp_path, path)
+            return info
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        # UnidentifiedImageError is an OSError; the exception must pickle back to the parent
+        raise ValueError("File is not a supported image") from None
+
+def _dhash(image) -> int:
+    """64-bit difference hash of an oriented Pillow image.
+    
+    The image is shrunk to 9x8 grayscale and each bit records whether a
+    pixel is brighter than its right neighbour, so re-encodes, resizes and
+    small edits change only a few bits.
+    """
+    from PIL import Image
+    
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+def dhash(path: str, max_pixels: int) -> Optional[int]:
+    """_dhash of an image file, or None if it cannot be read. JPEGs are decoded at a reduced scale."""
+    from PIL import Image, ImageOps
+    
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(path) as image:
+            image.draft("L", (64, 64))
+            return _dhash(ImageOps.exif_transpose(image))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return None
+
+def analyse_upload(source: str, hash_size: int, max_pixels: int, exif_max_bytes: int) -> Dict:
+    """Format, dimensions, EXIF metadata and dhash of source, without writing anything.
+    
+    The hash is taken from the image scaled to fit hash_size (the
+    thumbnail size), as hash_photos does from stored thumbnails, with JPEGs
+    decoded at that reduced scale. Raises ValueError for anything Pillow
+    cannot read as an image.
+    """
+    from PIL import Image, ImageOps
+    
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(source) as image:
+            info = {"format": image.format, "width": image.width, "height": image.height}
+            image.draft("RGB", (hash_size, hash_size))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((hash_size, hash_size), Image.LANCZOS)
+            info["dhash"] = _dhash(image)
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        # UnidentifiedImageError is an OSError; the exception must pickle back to the parent
+        raise ValueError("File is not a supported image") from None
+    info["metadata"] = exif.read_metadata(source, exif_max_bytes)
+    return info
+
+def dhash_many(paths: List[Optional[str]], max_pixels: int) -> List[Optional[int]]:
+    """dhash of each file (None for None or unreadable paths)."""
+    return [dhash(path, max_pixels) if path else None for path in paths]
+
+def read_metadata_many(paths: List[Optional[str]], exif_max_bytes: int) -> List[Dict]:
+    """EXIF metadata of each file ({} for None or unreadable paths)."""
+    return [exif.read_metadata(path, exif_max_bytes) if path else {} for path in paths]
+
+def extension(image_format: str) -> str:
+    return EXTENSIONS.get(image_format, f".{(image_format or 'bin').lower()}")
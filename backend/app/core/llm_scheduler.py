@@ -0,0 +1,128 @@
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.core.config import settings
+
+class SchedulerOverloaded(Exception):
+    """Raised when too many calls are already waiting for a slot."""
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    import openai
+    
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    ))
+
+class LLMScheduler:
+    """Admission control for outbound model calls.
+    
+    - Identical in-flight calls (same key) are coalesced into one.
+    - A global and a per-user semaphore cap concurrent calls.
+    - Once max_queue calls are waiting for a slot, new calls are rejected
+      with SchedulerOverloaded instead of piling up.
+    - Each attempt is bounded by a timeout; timeouts and transient API
+      errors are retried with exponential backoff and full jitter.
+    """
+    
+    def __init__(self, max_concurrency: int, per_user_concurrency: int,
+                 timeout_seconds: float, max_queue: int = settings.LLM_MAX_QUEUE,
+                 max_retries: int = settings.LLM_MAX_RETRIES,
+                 retry_base_delay: float = settings.LLM_RETRY_BASE_DELAY):
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._users: Dict[str, list] = {}  # user_id -> [semaphore, holders]
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.waiting = 0
+        self.active = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.retries = 0
+        self.timeouts = 0
+    
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None):
+        """Hold one global (and per-user) concurrency slot."""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerOverloaded("Too many AI requests are queued")
+        
+        entry = None
+        if user_id:
+            entry = self._users.setdefault(user_id, [asyncio.Semaphore(self.per_user_concurrency), 0])
+            entry[1] += 1
+        
+        acquired = []
+        self.waiting += 1
+        try:
+            try:
+                if entry is not None:
+                    await entry[0].acquire()
+                    acquired.append(entry[0])
+                await self._global.acquire()
+                acquired.append(self._global)
+            finally:
+                self.waiting -= 1
+            
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._users[user_id]
+    
+    async def run(self, key: Optional[Hashable], user_id: Optional[str],
+                  call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() under the limits, sharing the result with identical in-flight calls."""
+        if key is not None:
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                return await asyncio.shield(task)
+        
+        task = asyncio.create_task(self._execute(user_id, call))
+        if key is not None:
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller going away doesn't cancel it for the others
+        return await asyncio.shield(task)
+    
+    async def _execute(self, user_id: Optional[str], call: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.slot(user_id):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await asyncio.wait_for(call(), timeout=self.timeout_seconds)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.timeouts += 1
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(random.uniform(0, self.retry_base_delay * 2 ** attempt))
+    
+    def stats(self) -> Dict:
+        return {
+            "waiting": self.waiting,
+            "active": self.active,
+            "inflight_keys": len(self._inflight),
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+        }
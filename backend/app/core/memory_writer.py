@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+
+class MemoryWriter:
+    """Write-behind queue for vector memory.
+    
+    Writes are queued and flushed in batches, either when a batch is full or
+    when the flush interval elapses, so request handlers never wait on the
+    embedding and upsert round trips. The queue is bounded: producers wait a
+    short while for room and the write is dropped (and counted) beyond that.
+    """
+    
+    def __init__(self, store_batch: Callable[[List[Dict]], Awaitable[None]],
+                 batch_size: int = settings.MEMORY_WRITE_BATCH_SIZE,
+                 flush_seconds: float = settings.MEMORY_WRITE_FLUSH_SECONDS,
+                 max_queue: int = settings.MEMORY_WRITE_QUEUE_SIZE):
+        self._store_batch = store_batch
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start the background flush loop on the running event loop."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+    
+    async def enqueue(self, content: str, user_id: str, metadata: Optional[Dict] = None) -> bool:
+        """Queue a memory for writing; returns False if it had to be dropped."""
+        item = {"content": content, "user_id": user_id, "metadata": metadata}
+        
+        if not self.running:
+            # No background loop (e.g. scripts): write straight through.
+            await self._flush([item])
+            return True
+        
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=settings.MEMORY_WRITE_ENQUEUE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            print("Memory write queue is full, dropping write")
+            return False
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _flush(self, batch: List[Dict]):
+        for attempt in range(settings.MEMORY_WRITE_MAX_RETRIES + 1):
+            try:
+                await self._store_batch(batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                if attempt == settings.MEMORY_WRITE_MAX_RETRIES:
+                    self.failed += len(batch)
+                    print(f"Error flushing {len(batch)} memory writes: {e}")
+                    return
+                await asyncio.sleep(0.5 * 2 ** attempt)
+    
+    async def drain(self, timeout: float = settings.MEMORY_WRITE_DRAIN_SECONDS):
+        """Flush everything still queued, then stop the background loop."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Timed out draining memory writes, {self._queue.qsize()} left unwritten")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
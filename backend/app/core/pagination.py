@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, NamedTuple, Optional, Sequence, Tuple, Type
+import orjson
+from fastapi import HTTPException, Query, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import Select, tuple_
+from app.core import collection_versions
+from app.core.config import settings
+from app.core.query_cache import CachedResponse, query_cache
+from app.core.responses import FastJSONResponse
+
+class PageParams(NamedTuple):
+    cursor: Optional[str]
+    limit: int
+    request: Request
+
+def page_params(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT)
+) -> PageParams:
+    """Dependency for keyset-paginated list endpoints."""
+    return PageParams(cursor=cursor, limit=limit, request=request)
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    """Decode a cursor back into typed values for the given sort columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match sort order")
+        
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return tuple(decoded)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def _fetch_page(db, stmt: Select, sort_columns: Sequence, page: PageParams,
+                     schema: Optional[Type[BaseModel]]) -> Tuple[list, Optional[str]]:
+    """Rows of one page (dicts when schema is given, else ORM objects) and the next cursor."""
+    if page.cursor:
+        stmt = stmt.where(tuple_(*sort_columns) < tuple_(*decode_cursor(page.cursor, sort_columns)))
+    stmt = stmt.order_by(*[column.desc() for column in sort_columns]).limit(page.limit + 1)
+    
+    if schema is not None:
+        model = stmt.column_descriptions[0]["entity"]
+        stmt = stmt.with_only_columns(*[getattr(model, name) for name in schema.model_fields])
+        result = await db.execute(stmt)
+        rows = [dict(row) for row in result.mappings()]
+    else:
+        result = await db.execute(stmt)
+        rows = result.scalars().all()
+    
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            last[column.key] if schema is not None else getattr(last, column.key) for column in sort_columns
+        ])
+    return rows, next_cursor
+
+def _set_next_page(response: Response, page: PageParams, next_cursor: Optional[str]):
+    if next_cursor:
+        next_url = page.request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+async def paginate(db, stmt: Select, sort_columns: Sequence, page: PageParams, response: Response,
+                   schema: Optional[Type[BaseModel]] = None, user_id: Optional[str] = None):
+    """Fetch one page of stmt, newest first, ordered by sort_columns.
+    
+    sort_columns must be non-null and end with a unique column (the primary
+    key) so the order is stable. When more rows remain, the cursor for the
+    next page is returned in the X-Next-Cursor header and a Link header.
+    
+    Routes that pass their response schema opt in to the fast path (unless
+    FAST_JSON_RESPONSES is off): only the schema's columns are selected and
+    the rows are returned as an orjson FastJSONResponse, skipping ORM object
+    construction and response-model validation.
+    
+    Passing user_id enables conditional GET: the response carries an ETag
+    derived from the user's collection version (see collection_versions),
+    and a matching If-None-Match is answered with 304 before any row is read.
+    On the fast path it also enables the Redis query cache, which stores the
+    encoded page together with its ETag and cursor.
+    """
+    model = stmt.column_descriptions[0]["entity"]
+    collection = model.__tablename__
+    fast = schema is not None and settings.FAST_JSON_RESPONSES
+    
+    if user_id is not None and fast and query_cache.enabled():
+        async def load(session) -> CachedResponse:
+            version = await collection_versions.current(session, user_id, collection)
+            rows, next_cursor = await _fetch_page(session, stmt, sort_columns, page, schema)
+            headers = {"etag": collection_versions.etag(user_id, collection, version, page.request)}
+            if next_cursor:
+                headers["x-next-cursor"] = next_cursor
+            return CachedResponse(orjson.dumps(rows), headers)
+        
+        entry = await query_cache.get_or_load(db, user_id, [collection], query_cache.scope(page.request), load)
+        cached = collection_versions.not_modified_response(page.request, entry.headers["etag"])
+        if cached is not None:
+            return cached
+        response.headers.update(collection_versions.conditional_headers(entry.headers["etag"]))
+        _set_next_page(response, page, entry.headers.get("x-next-cursor"))
+        return FastJSONResponse(entry.body, page.request, headers=dict(response.headers))
+    
+    if user_id is not None:
+        cached = await collection_versions.not_modified(db, user_id, collection, page.request, response)
+        if cached is not None:
+            return cached
+    
+    rows, next_cursor = await _fetch_page(db, stmt, sort_columns, page, schema if fast else None)
+    _set_next_page(response, page, next_cursor)
+    if fast:
+        return FastJSONResponse(rows, page.request, headers=dict(response.headers))
+    return rows
@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.security import pwd_context
+
+class HashingOverloaded(Exception):
+    """Raised when too many password hashes are already waiting for a worker."""
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification off the event loop.
+    
+    A small thread pool is enough: the bcrypt extension releases the GIL
+    while hashing, so workers run in parallel without blocking the loop.
+    Once max_pending calls are queued or running, new ones are rejected
+    with HashingOverloaded instead of piling up behind a login storm.
+    """
+    
+    def __init__(self, workers: int = settings.PASSWORD_HASH_WORKERS,
+                 max_pending: int = settings.PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+    
+    async def _run(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingOverloaded("Too many password checks are queued")
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+    
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Check a password; returns (valid, new_hash).
+        
+        new_hash is set when the stored hash uses outdated cost parameters
+        and should be replaced. Without a stored hash (unknown user) a dummy
+        hash is verified so the response takes as long as a real check.
+        """
+        if hashed_password is None:
+            await self._run(pwd_context.dummy_verify)
+            return False, None
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self.rehashed += 1
+        return valid, new_hash
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def stats(self) -> Dict:
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,266 @@
+import asyncio
+import base64
+import mimetypes
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import bindparam, select, update
+from app.core.ai_client import ai_client
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.photo_storage import photo_storage
+from app.core.query_cache import query_cache
+from app.models.photo import Photo
+
+# Columns the pipeline needs; the rest of the row is never loaded
+PHOTO_COLUMNS = (
+    Photo.id, Photo.user_id, Photo.file_path, Photo.file_name, Photo.content_hash, Photo.description,
+    Photo.location_name, Photo.taken_at, Photo.camera, Photo.tags, Photo.ai_caption, Photo.ai_tags,
+)
+
+def _read_data_url(path: str) -> Optional[str]:
+    mime, _ = mimetypes.guess_type(path)
+    if not mime or not mime.startswith("image/"):
+        return None
+    try:
+        if os.path.getsize(path) > settings.PHOTO_CAPTION_MAX_IMAGE_BYTES:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+async def image_url(photo) -> Optional[str]:
+    """URL the caption model can see: remote URLs as-is, local images inlined as data URLs."""
+    if photo.file_path.startswith(("http://", "https://")):
+        return photo.file_path
+    if photo.content_hash:
+        # Uploaded photos: the web rendition is plenty for the model and small to inline
+        path = photo_storage.path("web", photo.content_hash)
+    else:
+        path = photo_storage.local_path(photo.file_path)
+    if path is None:
+        return None
+    # File reads and base64 run off the event loop
+    return await asyncio.to_thread(_read_data_url, path)
+
+def photo_details(photo) -> str:
+    """Metadata sent alongside (or instead of) the image."""
+    lines = [f"File name: {photo.file_name}"]
+    for label, value in (
+        ("Description", photo.description),
+        ("Place", photo.location_name),
+        ("Taken", photo.taken_at),
+        ("Camera", photo.camera),
+        ("User tags", ", ".join(map(str, photo.tags)) if photo.tags else None),
+    ):
+        if value:
+            lines.append(f"{label}: {value}")
+    return "\n".join(lines)
+
+def search_text(photo, caption: str, tags: Optional[List[str]]) -> str:
+    """Text embedded for semantic photo search."""
+    parts = [caption]
+    if tags:
+        parts.append("Tags: " + ", ".join(tags))
+    for value in (photo.description, photo.location_name):
+        if value:
+            parts.append(value)
+    if photo.tags:
+        parts.append(", ".join(map(str, photo.tags)))
+    return "\n".join(parts)
+
+class PhotoCaptioner:
+    """Background pipeline that captions, tags and indexes new photos.
+    
+    create_photo only queues the photo id, so it never waits on the model.
+    Ids are collected into batches (by size or flush interval); each batch
+    loads its photos in one query, captions them concurrently through the
+    AI client's caption scheduler (which bounds and retries the calls,
+    separately from interactive chat), writes captions and tags back in one
+    executemany UPDATE and upserts caption embeddings into the photo vector
+    collection for semantic search.
+    
+    The queue only lives in memory. Photos that never made it through (queue
+    full, worker restart, failed caption) keep a NULL ai_caption, which is
+    what the caption_photos command picks up.
+    """
+    
+    def __init__(self, ai_client, batch_size: int = settings.PHOTO_CAPTION_BATCH_SIZE,
+                 flush_seconds: float = settings.PHOTO_CAPTION_FLUSH_SECONDS,
+                 max_queue: int = settings.PHOTO_CAPTION_QUEUE_SIZE,
+                 concurrency: int = settings.PHOTO_CAPTION_CONCURRENCY):
+        self.ai_client = ai_client
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        # Bounds images held in memory; the model calls are capped by ai_client.caption_scheduler
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self.captioned = 0
+        self.failed = 0
+        self.dropped = 0
+        self.indexed = 0
+        self.index_failed = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.PHOTO_CAPTION_ENABLED and bool(self.ai_client.openai_api_key)
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start the background batch loop on the running event loop."""
+        if self.enabled and not self.running:
+            self._task = asyncio.create_task(self._run())
+    
+    def enqueue(self, photo_id: str) -> bool:
+        """Queue a photo for captioning; False if it was left for the backfill command."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(photo_id)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print("Photo caption queue is full, leaving photo for backfill")
+            return False
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self.process(list(dict.fromkeys(batch)))
+            except Exception as e:
+                print(f"Error captioning {len(batch)} photos: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def process(self, photo_ids: Sequence[str]) -> int:
+        """Caption, store and index the given photos that have no caption yet.
+        
+        Returns how many were captioned.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(*PHOTO_COLUMNS).where(Photo.id.in_(photo_ids), Photo.ai_caption.is_(None))
+            )
+            photos = result.all()
+        if not photos:
+            return 0
+        
+        # The session is closed while the model works, so no connection is held
+        captions = await asyncio.gather(*[self._caption(photo) for photo in photos])
+        done = [(photo, caption) for photo, caption in zip(photos, captions) if caption is not None]
+        if not done:
+            return 0
+        
+        try:
+            await self._write_back(done)
+        except Exception:
+            self.failed += len(done)
+            raise
+        self.captioned += len(done)
+        
+        await self.index([
+            {"id": photo.id, "user_id": photo.user_id, "text": search_text(photo, caption["caption"], caption["tags"])}
+            for photo, caption in done
+        ])
+        return len(done)
+    
+    async def _caption(self, photo) -> Optional[Dict]:
+        async with self._semaphore:
+            try:
+                return await self.ai_client.caption_photo(photo_details(photo), await image_url(photo))
+            except Exception as e:
+                self.failed += 1
+                print(f"Error captioning photo {photo.id}: {e}")
+                return None
+    
+    async def _write_back(self, done: List):
+        now = datetime.utcnow()
+        rows = [
+            {"photo_id": photo.id, "ai_caption": caption["caption"], "ai_tags": caption["tags"], "updated_at": now}
+            for photo, caption in done
+        ]
+        # Core executemany rather than ORM bulk update, which fails the batch
+        # when a photo was deleted while it was being captioned
+        stmt = update(Photo.__table__).where(Photo.__table__.c.id == bindparam("photo_id"))
+        for attempt in range(settings.PHOTO_CAPTION_MAX_RETRIES + 1):
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(stmt, rows)
+                    await db.commit()
+                break
+            except Exception:
+                if attempt == settings.PHOTO_CAPTION_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        
+        for user_id in {photo.user_id for photo, _ in done}:
+            await query_cache.invalidate(user_id, Photo.__tablename__)
+    
+    async def index(self, items: List[Dict]):
+        """Embed and upsert photo search texts, given as {"id", "user_id", "text"} dicts.
+        
+        Point ids are the photo ids, so indexing a photo again replaces it.
+        """
+        if not self.ai_client.embeddings or not items:
+            return
+        try:
+            vectors = await self.ai_client.embed_many([item["text"] for item in items])
+            await self.ai_client.photo_vectors.upsert([
+                {
+                    "id": item["id"],
+                    "vector": vector,
+                    "payload": {"user_id": item["user_id"], "photo_id": item["id"], "content": item["text"]},
+                }
+                for item, vector in zip(items, vectors)
+            ])
+            self.indexed += len(items)
+        except Exception as e:
+            self.index_failed += len(items)
+            print(f"Error indexing {len(items)} photos: {e}")
+    
+    async def drain(self, timeout: float = settings.PHOTO_CAPTION_DRAIN_SECONDS):
+        """Finish the queued photos (within timeout), then stop the background loop."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Timed out draining photo captions, {self._queue.qsize()} left for backfill")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "captioned": self.captioned,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "indexed": self.indexed,
+            "index_failed": self.index_failed,
+        }
+
+photo_captioner = PhotoCaptioner(ai_client)
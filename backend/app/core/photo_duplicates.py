@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.core import collection_versions, hamming_index
+from app.core.config import settings
+from app.core.photo_storage import photo_storage
+from app.models.photo import Photo
+
+# Rows committed late can carry an updated_at slightly older than what was
+# already loaded, so refreshes look back this far (already loaded ids are skipped)
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+def to_column(value: Optional[int]) -> Optional[int]:
+    """Unsigned 64-bit hash -> the signed value stored in BIGINT."""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def from_column(value: Optional[int]) -> Optional[int]:
+    if value is None:
+        return None
+    return value & ((1 << 64) - 1)
+
+class _UserHashes:
+    def __init__(self):
+        self.index = hamming_index.HammingIndex()  # photo id -> hash
+        self.version = -1  # photos collection version the index was last refreshed at
+        self.loaded_until: Optional[datetime] = None  # newest updated_at loaded
+        self.clusters: Dict[int, List[List[str]]] = {}  # max distance -> clusters at this version
+
+class DuplicateIndex:
+    """Per-user indexes of photo perceptual hashes, for near-duplicate lookups.
+    
+    A user's HammingIndex is loaded on first use and kept in an in-process LRU of
+    PHOTO_DUPLICATE_INDEX_USERS users. Before each lookup the photos
+    collection version (one primary key read) is compared with the one the
+    index was refreshed at; when another request or worker has written
+    photos since, only rows updated since the last refresh are loaded.
+    Photos deleted since they were loaded can still match, so callers
+    re-read what they find.
+    """
+    
+    def __init__(self, max_users: int = settings.PHOTO_DUPLICATE_INDEX_USERS,
+                 max_distance: int = settings.PHOTO_DUPLICATE_MAX_DISTANCE):
+        self.max_users = max_users
+        self.max_distance = max_distance
+        self._users: "OrderedDict[str, _UserHashes]" = OrderedDict()
+        self.lookups = 0
+        self.matches = 0
+        self.refreshes = 0
+    
+    async def _load(self, db, user_id: str) -> _UserHashes:
+        version = await collection_versions.current(db, user_id, Photo.__tablename__)
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = _UserHashes()
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        if entry.version == version:
+            return entry
+        
+        query = (
+            select(Photo.id, Photo.perceptual_hash, Photo.updated_at)
+            .where(Photo.user_id == user_id, Photo.perceptual_hash.is_not(None))
+        )
+        if entry.loaded_until is not None:
+            query = query.where(Photo.updated_at >= entry.loaded_until - REFRESH_OVERLAP)
+        rows = (await db.execute(query)).all()
+        for photo_id, value, updated_at in rows:
+            entry.index.add(photo_id, from_column(value))
+            if entry.loaded_until is None or updated_at > entry.loaded_until:
+                entry.loaded_until = updated_at
+        entry.version = version
+        entry.clusters = {}
+        self.refreshes += 1
+        return entry
+    
+    async def find(self, db, user_id: str, value: int, max_distance: Optional[int] = None) -> List[Tuple[int, str]]:
+        """(distance, photo id) of the user's photos within max_distance of value, closest first."""
+        entry = await self._load(db, user_id)
+        self.lookups += 1
+        found = entry.index.search(value, self.max_distance if max_distance is None else max_distance)
+        if found:
+            self.matches += 1
+        return found
+    
+    def add(self, user_id: str, photo_id: str, value: int):
+        """Add a photo this worker just created, so the next lookup sees it without a reload."""
+        entry = self._users.get(user_id)
+        if entry is not None:
+            entry.index.add(photo_id, value)
+            entry.clusters = {}
+    
+    async def clusters(self, db, user_id: str, max_distance: Optional[int] = None) -> List[List[str]]:
+        """Groups of photo ids that are near-duplicates of each other, largest first.
+        
+        Built in the photo process pool: one index search per distinct hash
+        rather than comparing every pair. The result is kept until the
+        user's photos change.
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        entry = await self._load(db, user_id)
+        cached = entry.clusters
+        found = cached.get(max_distance)
+        if found is None:
+            found = await photo_storage.run(hamming_index.clusters, list(entry.index.hashes.items()), max_distance)
+            # Replaced whenever photos were added meanwhile
+            cached[max_distance] = found
+        return found
+    
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._users),
+            "hashes": sum(len(entry.index) for entry in self._users.values()),
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "refreshes": self.refreshes,
+        }
+
+duplicate_index = DuplicateIndex()
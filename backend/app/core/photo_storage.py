@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from fastapi import HTTPException, Request, status
+from starlette.formparsers import MultiPartException, MultiPartParser
+from app.core import image_processing
+from app.core.config import settings
+
+RENDITION_SIZES = {"thumb": settings.PHOTO_THUMBNAIL_SIZE, "web": settings.PHOTO_WEB_SIZE}
+
+class ImageProcessingOverloaded(Exception):
+    """Raised when too many images are already waiting for the process pool."""
+
+class UploadTooLarge(Exception):
+    """Raised while streaming once an upload exceeds PHOTO_UPLOAD_MAX_BYTES."""
+
+class _HashingFile:
+    """Sink for one multipart file part: writes to disk, hashing and counting as it goes.
+    
+    Starlette calls write() in its thread pool for objects that are not
+    in-memory spooled files, so hashing and disk I/O stay off the loop.
+    """
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._file = open(path, "wb")
+    
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge()
+        self.sha256.update(data)
+        self._file.write(data)
+    
+    def seek(self, offset: int):
+        self._file.flush()
+    
+    def close(self):
+        self._file.close()
+
+class _UploadParser(MultiPartParser):
+    """Starlette's multipart parser with file parts streamed into _HashingFile sinks."""
+    
+    def __init__(self, request: Request, tmp_dir: str, max_bytes: int):
+        super().__init__(request.headers, request.stream(), max_files=1, max_fields=50)
+        self.tmp_dir = tmp_dir
+        self.max_bytes = max_bytes
+        self.sinks: List[_HashingFile] = []
+    
+    def on_headers_finished(self):
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            # Replace the spooled temp file the base class just created
+            upload.file.close()
+            upload.file = _HashingFile(os.path.join(self.tmp_dir, uuid.uuid4().hex), self.max_bytes)
+            self.sinks.append(upload.file)
+
+class ReceivedUpload:
+    """A streamed upload sitting in the temp directory, hashed but not yet stored."""
+    
+    def __init__(self, fields: Dict[str, List[str]], file_name: str, sink: _HashingFile):
+        self.fields = fields
+        self.file_name = file_name
+        self.tmp_path = sink.path
+        self.size = sink.size
+        self.content_hash = sink.sha256.hexdigest()
+    
+    def discard(self):
+        """Remove the temp file unless place() already moved it into place."""
+        _unlink(self.tmp_path)
+
+class ProcessedUpload(NamedTuple):
+    original: str  # absolute path the original is stored at by place()
+    metadata: Dict  # taken_at, latitude/longitude, camera found in the EXIF header
+    dhash: Optional[int]  # perceptual hash, see image_processing.dhash
+
+class PhotoStorage:
+    """Content-addressed photo files under PHOTO_STORAGE_DIR.
+    
+    Uploads are streamed to a temp file chunk by chunk while being hashed,
+    so an upload never sits in worker memory. The file is then stored once
+    per distinct content:
+    
+        originals/ab/<sha256>.jpg    the uploaded bytes
+        web/ab/<sha256>.jpg          PHOTO_WEB_SIZE rendition
+        thumb/ab/<sha256>.jpg        PHOTO_THUMBNAIL_SIZE rendition
+    
+    Renditions are made in a bounded process pool (decoding is CPU bound
+    and holds the GIL). Once max_pending images are queued or running, new
+    uploads are rejected with ImageProcessingOverloaded instead of piling
+    up. Workers are spawned rather than forked, so they don't inherit the
+    event loop or connection pools, and are recycled every
+    PHOTO_PROCESS_TASKS_PER_CHILD images to hand decoder memory back.
+    Other CPU-bound photo work (hashing, duplicate clustering) goes through
+    the same pool via run().
+    """
+    
+    def __init__(self, root: str = settings.PHOTO_STORAGE_DIR,
+                 workers: int = settings.PHOTO_PROCESS_WORKERS,
+                 max_pending: int = settings.PHOTO_PROCESS_MAX_PENDING):
+        self.root = root
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.stored = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.bytes_received = 0
+    
+    def path(self, kind: str, content_hash: str, ext: str = ".jpg") -> str:
+        """Absolute path of stored content: "originals" (with its own ext), "web" or "thumb"."""
+        return os.path.join(self.root, kind, content_hash[:2], content_hash + ext)
+    
+    def relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+    
+    def local_path(self, file_path: str) -> Optional[str]:
+        """Resolve a stored file_path inside the storage root, or None if it points elsewhere."""
+        root = os.path.realpath(self.root)
+        if not file_path.startswith(root + os.sep):
+            file_path = os.path.join(root, file_path.lstrip("/"))
+        path = os.path.realpath(file_path)
+        if os.path.commonpath([root, path]) != root:
+            return None
+        return path
+    
+    async def receive(self, request: Request) -> ReceivedUpload:
+        """Stream a multipart upload with one "file" part to a temp file.
+        
+        Other parts are returned as form fields (repeated names collect
+        into lists). The caller must discard() the upload when done.
+        """
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.PHOTO_UPLOAD_MAX_BYTES + 64 * 1024:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Photo is too large")
+        if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Expected multipart/form-data")
+        
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        parser = _UploadParser(request, tmp_dir, settings.PHOTO_UPLOAD_MAX_BYTES)
+        try:
+            form = await parser.parse()
+        except BaseException as e:
+            for sink in parser.sinks:
+                sink.close()
+                _unlink(sink.path)
+            if isinstance(e, UploadTooLarge):
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Photo is too large")
+            if isinstance(e, MultiPartException):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+            raise
+        
+        for sink in parser.sinks:
+            sink.close()
+        upload = form.get("file")
+        if not parser.sinks or isinstance(upload, str) or upload is None:
+            for sink in parser.sinks:
+                _unlink(sink.path)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected an image in the "file" field')
+        
+        fields: Dict[str, List[str]] = {}
+        for name, value in form.multi_items():
+            if isinstance(value, str):
+                fields.setdefault(name, []).append(value)
+        received = ReceivedUpload(fields, os.path.basename(upload.filename or "") or "upload", upload.file)
+        self.bytes_received += received.size
+        return received
+    
+    async def run(self, fn: Callable, *args):
+        """Call fn(*args) in the process pool; raises ImageProcessingOverloaded when it is full."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ImageProcessingOverloaded("Too many images are queued for processing")
+        
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=settings.PHOTO_PROCESS_TASKS_PER_CHILD,
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+    
+    async def process(self, upload: ReceivedUpload) -> ProcessedUpload:
+        """Read the format, EXIF header and perceptual hash of an upload.
+        
+        Nothing is written yet, so an upload that turns out to be a
+        near-duplicate can simply be discarded. Follow with place() to keep
+        it. Raises HTTPException 400 for files that are not images.
+        """
+        try:
+            info = await self.run(
+                image_processing.analyse_upload, upload.tmp_path, settings.PHOTO_THUMBNAIL_SIZE,
+                settings.PHOTO_MAX_PIXELS, settings.PHOTO_EXIF_MAX_BYTES
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        original = self.path("originals", upload.content_hash, image_processing.extension(info["format"]))
+        return ProcessedUpload(original, info["metadata"], info["dhash"])
+    
+    async def place(self, upload: ReceivedUpload, processed: ProcessedUpload) -> str:
+        """Make the renditions and move the original into place.
+        
+        Renditions of content that is already stored (by any user) are not
+        made again. Returns the file_path relative to the storage root.
+        """
+        targets = [(self.path(kind, upload.content_hash), size) for kind, size in RENDITION_SIZES.items()]
+        try:
+            await self.run(
+                image_processing.make_renditions, upload.tmp_path, targets,
+                settings.PHOTO_RENDITION_QUALITY, settings.PHOTO_MAX_PIXELS
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        if await asyncio.to_thread(_place, upload.tmp_path, processed.original):
+            self.stored += 1
+        else:
+            self.deduplicated += 1
+        return self.relative(processed.original)
+    
+    def _resolve(self, file_path: str) -> Optional[str]:
+        return None if file_path.startswith(("http://", "https://")) else self.local_path(file_path)
+    
+    async def _map(self, fn: Callable, paths: List[Optional[str]], *args) -> List:
+        """fn(chunk, *args) over paths in the process pool, one chunk per worker."""
+        size = -(-len(paths) // self.workers) or 1
+        chunks = await asyncio.gather(*[self.run(fn, paths[i:i + size], *args) for i in range(0, len(paths), size)])
+        return [value for chunk in chunks for value in chunk]
+    
+    async def read_metadata(self, file_paths: List[str]) -> List[Dict]:
+        """EXIF metadata of stored files, read in the process pool ({} where there is none).
+        
+        The work is split into one task per pool worker. Paths outside the
+        storage root (or URLs) are skipped.
+        """
+        paths = [self._resolve(path) for path in file_paths]
+        return await self._map(image_processing.read_metadata_many, paths, settings.PHOTO_EXIF_MAX_BYTES)
+    
+    async def image_hashes(self, photos) -> List[Optional[int]]:
+        """Perceptual hashes of stored photos (rows with file_path and content_hash), None where unreadable.
+        
+        Uploaded photos are hashed from their thumbnail, like at upload
+        time; other local files from the original.
+        """
+        paths = []
+        for photo in photos:
+            thumb = self.path("thumb", photo.content_hash) if photo.content_hash else None
+            paths.append(thumb if thumb and os.path.isfile(thumb) else self._resolve(photo.file_path))
+        return await self._map(image_processing.dhash_many, paths, settings.PHOTO_MAX_PIXELS)
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def stats(self) -> Dict:
+        return {
+            "pending": self.pending,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "bytes_received": self.bytes_received,
+        }
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _place(tmp_path: str, path: str) -> bool:
+    """Move tmp_path to path unless identical content is already there; True if moved."""
+    if os.path.exists(path):
+        os.unlink(tmp_path)
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return True
+
+photo_storage = PhotoStorage()
@@ -0,0 +1,84 @@
+from typing import Dict
+from app.core.config import settings
+
+VECTOR_SIZE = 1536  # OpenAI text-embedding-ada-002
+
+def payload_indexes(collection_name: str) -> Dict[str, str]:
+    """Payload fields indexed per collection, as {field: schema type}.
+    
+    Every search is filtered by user_id, so it is always indexed; without the
+    index Qdrant has to scan payloads as the collection grows.
+    """
+    indexes = {"user_id": "keyword"}
+    if collection_name == settings.QDRANT_RESPONSE_CACHE_COLLECTION:
+        indexes.update({
+            "kind": "keyword",
+            "model": "keyword",
+            "context_hash": "keyword",
+            "expires_at": "float",
+        })
+    return indexes
+
+def collection_params() -> Dict:
+    """Keyword arguments for create_collection with the current layout."""
+    from qdrant_client.models import (
+        Distance, ScalarQuantization, ScalarQuantizationConfig, ScalarType, VectorParams
+    )
+    
+    params = {
+        "vectors_config": VectorParams(
+            size=VECTOR_SIZE,
+            distance=Distance.COSINE,
+            # Originals on disk; searches run on the quantized copy in RAM and
+            # only rescore the top candidates from disk.
+            on_disk=settings.QDRANT_VECTORS_ON_DISK
+        )
+    }
+    if settings.QDRANT_SCALAR_QUANTIZATION:
+        params["quantization_config"] = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    return params
+
+async def collection_exists(client, collection_name: str) -> bool:
+    """True if the name is a collection or an alias (as left by a migration)."""
+    collections = await client.get_collections()
+    if collection_name in {c.name for c in collections.collections}:
+        return True
+    aliases = await client.get_aliases()
+    return collection_name in {a.alias_name for a in aliases.aliases}
+
+async def ensure_payload_indexes(client, collection_name: str):
+    """Create any payload indexes from the layout that the collection lacks."""
+    from qdrant_client.models import PayloadSchemaType
+    
+    info = await client.get_collection(collection_name)
+    existing = set((info.payload_schema or {}).keys())
+    for field, schema in payload_indexes(collection_name).items():
+        if field not in existing:
+            await client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=PayloadSchemaType(schema)
+            )
+
+async def create_collection(client, collection_name: str, physical_name: str = None):
+    """Create a collection with the current layout and its payload indexes.
+    
+    physical_name lets the migration build the new layout under a different
+    name while still using the payload indexes of collection_name.
+    """
+    from qdrant_client.models import PayloadSchemaType
+    
+    name = physical_name or collection_name
+    await client.create_collection(collection_name=name, **collection_params())
+    for field, schema in payload_indexes(collection_name).items():
+        await client.create_payload_index(
+            collection_name=name,
+            field_name=field,
+            field_schema=PayloadSchemaType(schema)
+        )
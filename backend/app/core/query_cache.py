@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import random
+import zlib
+from typing import Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Sequence
+import orjson
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis, mark_redis_unavailable
+
+class CachedResponse(NamedTuple):
+    """An encoded JSON body plus the headers needed to rebuild the response."""
+    body: bytes
+    headers: Dict[str, str]
+    
+    def dumps(self) -> bytes:
+        # Header JSON never contains a raw newline, so it separates the parts
+        raw = orjson.dumps(self.headers) + b"\n" + self.body
+        if len(raw) >= settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return b"z" + zlib.compress(raw, 1)
+        return b"r" + raw
+    
+    @classmethod
+    def loads(cls, value: bytes) -> "CachedResponse":
+        raw = zlib.decompress(value[1:]) if value[:1] == b"z" else value[1:]
+        headers, _, body = raw.partition(b"\n")
+        return cls(body, orjson.loads(headers))
+
+class QueryCache:
+    """Read-through Redis cache of per-user GET responses.
+    
+    Entries are keyed by user, the generation of every collection the
+    response depends on, and a scope (path + query). Writers call
+    invalidate() after committing, which bumps the generations; entries of
+    older generations are never read again and expire on their own. A
+    reader that loaded data just before a write can only store it under the
+    old generation, so it cannot resurrect stale data.
+    
+    Misses are protected against stampedes twice: identical loads in this
+    process are coalesced, and across processes the first loader holds a
+    short Redis lock while the others wait briefly for its entry before
+    falling back to the database.
+    
+    Without Redis (or while it is backed off) every call loads directly.
+    
+    load() receives the session to read with. A coalesced load outlives
+    the request that started it, so it gets a session of its own rather
+    than that request's.
+    """
+    
+    def __init__(self, ttl_seconds: int = settings.QUERY_CACHE_TTL_SECONDS,
+                 lock_seconds: float = settings.QUERY_CACHE_LOCK_SECONDS,
+                 lock_wait_seconds: float = settings.QUERY_CACHE_LOCK_WAIT_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.lock_wait_seconds = lock_wait_seconds
+        # Generations must outlive every entry, or a reset to 0 could reach old entries
+        self.generation_ttl_seconds = max(ttl_seconds * 10, 24 * 3600)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.coalesced = 0
+        self.lock_waits = 0
+    
+    @staticmethod
+    def enabled() -> bool:
+        """Whether lookups can currently go to Redis."""
+        return settings.QUERY_CACHE_ENABLED and get_redis() is not None
+    
+    @staticmethod
+    def scope(request) -> str:
+        """Cache scope of a GET: its path and query string."""
+        return f"{request.url.path}?{request.url.query}"
+    
+    @staticmethod
+    def _generation_key(user_id: str, collection: str) -> str:
+        return f"qc:{user_id}:gen:{collection}"
+    
+    async def get_or_load(self, db, user_id: str, collections: Sequence[str], scope: str,
+                          load: Callable[..., Awaitable[Optional[CachedResponse]]]) -> Optional[CachedResponse]:
+        """Return the cached response for scope, calling load(session) on a miss.
+        
+        load() may return None for responses that must not be cached
+        (e.g. not found). It gets the caller's db when it runs for this
+        caller alone, and a fresh session when the load is shared.
+        """
+        redis = get_redis()
+        if redis is None or not settings.QUERY_CACHE_ENABLED:
+            self.bypassed += 1
+            return await load(db)
+        
+        try:
+            generations = await redis.mget([self._generation_key(user_id, c) for c in collections])
+            digest = hashlib.sha256(
+                "\0".join([scope, *[f"{c}={int(g or 0)}" for c, g in zip(collections, generations)]]).encode("utf-8")
+            ).hexdigest()
+            key = f"qc:{user_id}:{digest[:32]}"
+            value = await redis.get(key)
+        except Exception as e:
+            mark_redis_unavailable(e)
+            self.bypassed += 1
+            return await load(db)
+        
+        if value is not None:
+            try:
+                entry = CachedResponse.loads(value)
+                self.hits += 1
+                return entry
+            except (ValueError, zlib.error) as e:
+                print(f"Dropping unreadable query cache entry {key}: {e}")
+        
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        
+        task = asyncio.create_task(self._fill(redis, key, load))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller going away doesn't cancel it for the others
+        return await asyncio.shield(task)
+    
+    async def _fill(self, redis, key: str, load: Callable[..., Awaitable[Optional[CachedResponse]]]) -> Optional[CachedResponse]:
+        """Shared load, in a session that lives as long as the task (not the request)."""
+        async with AsyncSessionLocal() as db:
+            return await self._fill_with(redis, key, load, db)
+    
+    async def _fill_with(self, redis, key: str, load: Callable[..., Awaitable[Optional[CachedResponse]]],
+                         db) -> Optional[CachedResponse]:
+        lock_key = f"{key}:lock"
+        try:
+            locked = await redis.set(lock_key, b"1", nx=True, px=int(self.lock_seconds * 1000))
+            if not locked:
+                # Another worker is loading the same entry; give it a moment
+                self.lock_waits += 1
+                waited = 0.0
+                while waited < self.lock_wait_seconds:
+                    await asyncio.sleep(0.02)
+                    waited += 0.02
+                    value = await redis.get(key)
+                    if value is not None:
+                        return CachedResponse.loads(value)
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return await load(db)
+        
+        entry = await load(db)
+        try:
+            if entry is not None:
+                # Jitter spreads the expiry of entries filled together
+                ttl = int(self.ttl_seconds * random.uniform(0.9, 1.1)) or 1
+                await redis.set(key, entry.dumps(), ex=ttl)
+            if locked:
+                await redis.delete(lock_key)
+        except Exception as e:
+            mark_redis_unavailable(e)
+        return entry
+    
+    async def invalidate(self, user_id: str, *collections: str):
+        """Drop every cached response of the user that depends on collections.
+        
+        Call after the write has committed.
+        """
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for collection in collections:
+                    key = self._generation_key(user_id, collection)
+                    pipe.incr(key)
+                    pipe.expire(key, self.generation_ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            mark_redis_unavailable(e)
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "coalesced": self.coalesced,
+            "lock_waits": self.lock_waits,
+            "inflight": len(self._inflight),
+        }
+
+query_cache = QueryCache()
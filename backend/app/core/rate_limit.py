@@ -0,0 +1,73 @@
+import time
+from typing import Dict, Tuple
+from fastapi import Request
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+class RateLimited(Exception):
+    """Raised when a caller exceeded a limit; retry_after is in seconds."""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class RateLimiter:
+    """Fixed-window request counters, shared through Redis when available.
+    
+    Counters are keyed by (scope, key, window). With Redis every worker
+    counts against the same INCR key; without it (or while Redis is
+    backed off) each process counts on its own.
+    """
+    
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._window = 0
+        self._counts: Dict[str, int] = {}
+        self.rejected = 0
+    
+    def _current_window(self) -> Tuple[int, int]:
+        """Return (window number, seconds until it ends)."""
+        now = time.time()
+        window = int(now // self.window_seconds)
+        return window, max(1, int((window + 1) * self.window_seconds - now))
+    
+    async def hit(self, scope: str, key: str, limit: int):
+        """Count one request for key and raise RateLimited once it is over limit."""
+        window, retry_after = self._current_window()
+        counter_key = f"ratelimit:{scope}:{key}:{window}"
+        
+        count = None
+        redis = get_redis()
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.incr(counter_key)
+                    pipe.expire(counter_key, self.window_seconds)
+                    count, _ = await pipe.execute()
+            except Exception as e:
+                mark_redis_unavailable(e)
+        
+        if count is None:
+            if window != self._window:
+                self._window = window
+                self._counts.clear()
+            count = self._counts[counter_key] = self._counts.get(counter_key, 0) + 1
+        
+        if count > limit:
+            self.rejected += 1
+            raise RateLimited(retry_after)
+
+def client_ip(request: Request) -> str:
+    """Client address, taken from AUTH_CLIENT_IP_HEADER when behind a trusted proxy."""
+    if settings.AUTH_CLIENT_IP_HEADER:
+        forwarded = request.headers.get(settings.AUTH_CLIENT_IP_HEADER)
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+auth_rate_limiter = RateLimiter(settings.AUTH_RATE_LIMIT_WINDOW_SECONDS)
+
+async def limit_auth_attempts(request: Request, email: str):
+    """Per-IP and per-email throttling for endpoints that hash passwords."""
+    await auth_rate_limiter.hit("ip", client_ip(request), settings.AUTH_RATE_LIMIT_PER_IP)
+    await auth_rate_limiter.hit("email", email.lower(), settings.AUTH_RATE_LIMIT_PER_EMAIL)
@@ -0,0 +1,38 @@
+import time
+from app.core.config import settings
+
+_client = None
+_unavailable_until = 0.0
+
+def get_redis():
+    """Return the shared async Redis client, or None if Redis is not usable.
+    
+    Redis is optional: callers treat None as "no shared tier" and carry on
+    with their in-process or database path.
+    """
+    global _client
+    if not settings.REDIS_URL or time.monotonic() < _unavailable_until:
+        return None
+    
+    if _client is None:
+        import redis.asyncio as aioredis
+        
+        _client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_TIMEOUT,
+        )
+    return _client
+
+def mark_redis_unavailable(error: Exception):
+    """Bypass Redis for a while after a failed call instead of retrying per request."""
+    global _unavailable_until
+    print(f"Redis unavailable, bypassing for {settings.REDIS_RETRY_AFTER_SECONDS}s: {error}")
+    _unavailable_until = time.monotonic() + settings.REDIS_RETRY_AFTER_SECONDS
+
+async def close_redis():
+    """Close the shared Redis connection pool."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,103 @@
+from typing import Any, Dict, Generic, List, Optional, Sequence, TypeVar
+from sqlalchemy import Boolean, String, case, cast, column, delete, insert, select, update, values
+
+ModelT = TypeVar("ModelT")
+
+class Repository(Generic[ModelT]):
+    """Tenant-scoped CRUD for a model with a user_id column.
+    
+    Every operation is a single SQL statement: writes use RETURNING instead
+    of a follow-up SELECT/refresh, and updates and deletes match on both id
+    and user_id, so rows of other users behave as if they did not exist.
+    Methods return None/False when nothing matched; callers turn that into
+    a 404. The caller owns the transaction and commits.
+    """
+    
+    def __init__(self, model: type):
+        self.model = model
+    
+    def _owned(self, user_id: str, id: str) -> tuple:
+        return self.model.id == id, self.model.user_id == user_id
+    
+    async def get(self, db, user_id: str, id: str) -> Optional[ModelT]:
+        result = await db.execute(select(self.model).where(*self._owned(user_id, id)))
+        return result.scalar_one_or_none()
+    
+    async def create(self, db, user_id: str, data: Dict[str, Any]) -> ModelT:
+        result = await db.scalars(insert(self.model).values(**data, user_id=user_id).returning(self.model))
+        return result.one()
+    
+    async def create_many(self, db, user_id: str, rows: List[Dict[str, Any]]) -> List[ModelT]:
+        """INSERT all rows as one multi-row statement, returning objects in input order."""
+        if not rows:
+            return []
+        result = await db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            [{**row, "user_id": user_id} for row in rows]
+        )
+        return result.all()
+    
+    async def update(self, db, user_id: str, id: str, data: Dict[str, Any]) -> Optional[ModelT]:
+        """Set the given fields; an empty dict only bumps updated_at."""
+        result = await db.scalars(
+            update(self.model)
+            .where(*self._owned(user_id, id))
+            .values(**data)
+            .returning(self.model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return result.one_or_none()
+    
+    async def update_many(self, db, user_id: str, changes: Dict[str, Dict[str, Any]]) -> Dict[str, ModelT]:
+        """Apply partial updates to many rows in one UPDATE ... FROM (VALUES ...).
+        
+        changes maps row id to the fields to set. Each field travels with a
+        set_<field> flag, so fields an item leaves out keep their current
+        value (as opposed to being set to NULL). Returns the updated objects
+        by id.
+        """
+        if not changes:
+            return {}
+        
+        model = self.model
+        fields = sorted({field for item_changes in changes.values() for field in item_changes})
+        table = model.__table__
+        value_columns = [column("id", String)]
+        for field in fields:
+            value_columns += [column(f"set_{field}", Boolean), column(field, table.c[field].type)]
+        
+        data = []
+        for id, item_changes in changes.items():
+            row = [id]
+            for field in fields:
+                row += [field in item_changes, item_changes.get(field)]
+            data.append(tuple(row))
+        changed = values(*value_columns, name="changes").data(data)
+        
+        result = await db.scalars(
+            update(model)
+            .where(model.id == changed.c.id, model.user_id == user_id)
+            # A VALUES column that is NULL in every row is typed text by
+            # Postgres, so values are cast back to the column type
+            .values({
+                field: case((changed.c[f"set_{field}"], cast(changed.c[field], table.c[field].type)),
+                            else_=getattr(model, field))
+                for field in fields
+            })
+            .returning(model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return {obj.id: obj for obj in result.all()}
+    
+    async def delete(self, db, user_id: str, id: str) -> bool:
+        result = await db.execute(delete(self.model).where(*self._owned(user_id, id)).returning(self.model.id))
+        return result.scalar_one_or_none() is not None
+    
+    async def delete_many(self, db, user_id: str, ids: Sequence[str]) -> set:
+        """DELETE the user's rows among ids in one statement; returns the ids deleted."""
+        if not ids:
+            return set()
+        result = await db.scalars(
+            delete(self.model).where(self.model.user_id == user_id, self.model.id.in_(ids)).returning(self.model.id)
+        )
+        return set(result.all())
@@ -0,0 +1,196 @@
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.redis import get_redis, mark_redis_unavailable
+
+# How often expired near-duplicate entries are purged from Qdrant
+PURGE_INTERVAL_SECONDS = 600
+
+class ResponseCache:
+    """Per-user cache of LLM responses.
+    
+    The exact tier is keyed by a hash of (user, kind, prompt, context, model)
+    and lives in an in-process LRU in front of Redis. The optional semantic
+    tier stores prompt vectors in a dedicated Qdrant collection and serves a
+    cached response when a new prompt for the same user, kind, model and
+    context scores above RESPONSE_CACHE_SEMANTIC_THRESHOLD. Both tiers expire
+    entries after RESPONSE_CACHE_TTL_SECONDS.
+    """
+    
+    def __init__(self, ai_client, max_entries: int = settings.RESPONSE_CACHE_SIZE,
+                 ttl_seconds: int = settings.RESPONSE_CACHE_TTL_SECONDS,
+                 semantic_threshold: Optional[float] = settings.RESPONSE_CACHE_SEMANTIC_THRESHOLD):
+        self.ai_client = ai_client
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # The semantic tier needs Qdrant; it is off when vectors live in-process
+        self.semantic_threshold = semantic_threshold if settings.VECTOR_STORE != "local" else None
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._last_purge = 0.0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _digest(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    
+    def _key(self, user_id: str, kind: str, prompt: str, context: str, model: str) -> str:
+        return f"resp:{user_id}:{self._digest(kind, prompt, context, model)}"
+    
+    async def get(self, user_id: Optional[str], kind: str, prompt: str, context: str, model: str) -> Optional[str]:
+        """Return a cached response, trying the exact tier before the semantic one."""
+        if not user_id:
+            return None
+        
+        key = self._key(user_id, kind, prompt, context, model)
+        response = await self._get_exact(key)
+        if response is not None:
+            self.exact_hits += 1
+            return response
+        
+        if self.semantic_threshold is not None:
+            response = await self._get_semantic(user_id, kind, prompt, context, model)
+            if response is not None:
+                self.semantic_hits += 1
+                self._remember(key, response)
+                return response
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, user_id: Optional[str], kind: str, prompt: str, context: str, model: str, response: str):
+        """Cache a response in every enabled tier."""
+        if not user_id:
+            return
+        
+        key = self._key(user_id, kind, prompt, context, model)
+        self._remember(key, response)
+        
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, response.encode("utf-8"), ex=self.ttl_seconds)
+            except Exception as e:
+                mark_redis_unavailable(e)
+        
+        if self.semantic_threshold is not None:
+            await self._set_semantic(user_id, kind, prompt, context, model, response)
+    
+    def _remember(self, key: str, response: str):
+        self._local[key] = (time.time() + self.ttl_seconds, response)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+    
+    async def _get_exact(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > time.time():
+                self._local.move_to_end(key)
+                return response
+            del self._local[key]
+        
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(key)
+        except Exception as e:
+            mark_redis_unavailable(e)
+            return None
+        if raw is None:
+            return None
+        response = raw.decode("utf-8")
+        self._remember(key, response)
+        return response
+    
+    def _semantic_filter(self, user_id: str, kind: str, context: str, model: str):
+        from qdrant_client.models import FieldCondition, Filter, MatchValue, Range
+        
+        return Filter(must=[
+            FieldCondition(key="user_id", match=MatchValue(value=user_id)),
+            FieldCondition(key="kind", match=MatchValue(value=kind)),
+            FieldCondition(key="model", match=MatchValue(value=model)),
+            FieldCondition(key="context_hash", match=MatchValue(value=self._digest(context))),
+            FieldCondition(key="expires_at", range=Range(gt=time.time())),
+        ])
+    
+    async def _get_semantic(self, user_id: str, kind: str, prompt: str, context: str, model: str) -> Optional[str]:
+        client = self.ai_client
+        if not client.embeddings:
+            return None
+        
+        collection = settings.QDRANT_RESPONSE_CACHE_COLLECTION
+        try:
+            vector = await client.embed(prompt)
+            await client._ensure_collection(collection)
+            results = await client._qdrant_call(client.qdrant_client.search(
+                collection_name=collection,
+                query_vector=vector,
+                query_filter=self._semantic_filter(user_id, kind, context, model),
+                score_threshold=self.semantic_threshold,
+                limit=1
+            ))
+        except Exception as e:
+            print(f"Error looking up semantic response cache: {e}")
+            return None
+        
+        return results[0].payload.get("response") if results else None
+    
+    async def _set_semantic(self, user_id: str, kind: str, prompt: str, context: str, model: str, response: str):
+        client = self.ai_client
+        if not client.embeddings:
+            return
+        
+        from qdrant_client.models import PointStruct
+        
+        collection = settings.QDRANT_RESPONSE_CACHE_COLLECTION
+        try:
+            vector = await client.embed(prompt)
+            await client._ensure_collection(collection)
+            point = PointStruct(
+                # Deterministic id so re-caching the same prompt overwrites it
+                id=str(uuid.UUID(hex=self._digest(user_id, kind, prompt, context, model)[:32])),
+                vector=vector,
+                payload={
+                    "user_id": user_id,
+                    "kind": kind,
+                    "model": model,
+                    "context_hash": self._digest(context),
+                    "response": response,
+                    "expires_at": time.time() + self.ttl_seconds,
+                }
+            )
+            await client._qdrant_call(client.qdrant_client.upsert(collection_name=collection, points=[point]))
+            await self._purge_expired()
+        except Exception as e:
+            print(f"Error storing semantic response cache entry: {e}")
+    
+    async def _purge_expired(self):
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        from qdrant_client.models import FieldCondition, Filter, FilterSelector, Range
+        
+        client = self.ai_client
+        await client._qdrant_call(client.qdrant_client.delete(
+            collection_name=settings.QDRANT_RESPONSE_CACHE_COLLECTION,
+            points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key="expires_at", range=Range(lt=time.time()))
+            ]))
+        ))
+    
+    def stats(self) -> Dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "local_entries": len(self._local),
+        }
@@ -6,10 +6,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app.core.auth_cache import CachedUser, auth_cache
 from app.core.config import settings
 from app.core.database import get_db
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max pinned to the configured cost so verify_and_update flags any other cost
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -52,12 +60,29 @@ def decode_token(token: str) -> Dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+async def load_user(db: AsyncSession, user_id: str) -> Optional[CachedUser]:
+    """Fetch a user from the database as a CachedUser."""
+    from app.models.user import User
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    return CachedUser.from_model(user) if user is not None else None
+
+async def resolve_user(db: AsyncSession, user_id: str) -> Optional[CachedUser]:
+    """Return the user through the auth cache; the database is only hit on a miss."""
+    return await auth_cache.get_user(user_id, lambda id: load_user(db, id))
+
 async def get_current_user_id(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
 ) -> str:
-    """Extract user_id from JWT token for multi-tenant isolation."""
+    """Extract user_id from JWT token for multi-tenant isolation.
+    
+    With AUTH_ENFORCE_ACTIVE, the user must also exist and be active;
+    that check is served from the auth cache.
+    """
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = auth_cache.decode(token, decode_token)
     
     user_id: str = payload.get("sub")
     if user_id is None:
@@ -66,23 +91,36 @@ async def get_current_user_id(
             detail="Could not validate credentials",
         )
     
+    if settings.AUTH_ENFORCE_ACTIVE:
+        check_active(await resolve_user(db, user_id))
+    
     return user_id
 
-async def get_current_user(
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get the current authenticated user object."""
-    from app.models.user import User
-    
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    
+def check_active(user: Optional[CachedUser]) -> CachedUser:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive"
+        )
     return user
 
+async def get_current_user(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+) -> CachedUser:
+    """Get the current authenticated user (a cached snapshot, not an ORM object)."""
+    return check_active(await resolve_user(db, user_id))
+
+async def get_current_superuser(user: CachedUser = Depends(get_current_user)) -> CachedUser:
+    """The current user, who must be a superuser (for process-wide diagnostics)."""
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return user
@@ -0,0 +1,217 @@
+import csv
+import io
+import re
+import uuid
+from datetime import date, datetime
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from dateutil import parser as date_parser
+from pydantic import ValidationError
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from app.core import budget_rollups
+from app.core.config import settings
+from app.models.budget import Transaction, TransactionType
+from app.schemas.budget import TransactionCreate
+
+class ImportFormatError(ValueError):
+    """The upload cannot be read as the requested format at all."""
+
+# Header names (lower-cased) accepted for each field in CSV uploads
+CSV_COLUMNS = {
+    "date": ("date", "transaction date", "posted date", "posting date"),
+    "amount": ("amount",),
+    "debit": ("debit", "withdrawal"),
+    "credit": ("credit", "deposit"),
+    "type": ("type",),
+    "category": ("category",),
+    "description": ("description", "memo", "payee", "name"),
+}
+
+TYPE_NAMES = {
+    "income": TransactionType.INCOME, "credit": TransactionType.INCOME, "deposit": TransactionType.INCOME,
+    "expense": TransactionType.EXPENSE, "debit": TransactionType.EXPENSE, "withdrawal": TransactionType.EXPENSE,
+    "payment": TransactionType.EXPENSE,
+}
+
+COPY_COLUMNS = ["id", "user_id", "type", "amount", "category", "description", "date", "created_at", "updated_at"]
+
+# A parsed row is either TransactionCreate input or the reason it was rejected
+ParsedRow = Tuple[int, Union[Dict, str]]
+
+def parse_amount(value: str) -> float:
+    value = value.strip().replace(",", "").replace("$", "")
+    if value.startswith("(") and value.endswith(")"):
+        value = "-" + value[1:-1]
+    return float(value)
+
+def parse_date(value: str, dayfirst: bool = False) -> date:
+    value = value.strip()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return date_parser.parse(value, dayfirst=dayfirst).date()
+
+def _signed(amount: float, type_name: Optional[str]) -> Tuple[TransactionType, float]:
+    """Transactions store a positive amount; the type comes from the column or the sign."""
+    transaction_type = TYPE_NAMES.get((type_name or "").strip().lower())
+    if transaction_type is None:
+        transaction_type = TransactionType.EXPENSE if amount < 0 else TransactionType.INCOME
+    return transaction_type, abs(amount)
+
+def csv_rows(stream: io.TextIOBase, dayfirst: bool = False) -> Iterator[ParsedRow]:
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        raise ImportFormatError("CSV file is empty")
+    
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "date" not in columns or not ("amount" in columns or "debit" in columns or "credit" in columns):
+        raise ImportFormatError("CSV header needs a date column and an amount (or debit/credit) column")
+    
+    def cell(row: List[str], field: str) -> str:
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+    
+    for row in reader:
+        line = reader.line_num
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            if "amount" in columns:
+                amount = parse_amount(cell(row, "amount"))
+            else:
+                credit, debit = cell(row, "credit"), cell(row, "debit")
+                amount = (parse_amount(credit) if credit else 0.0) - (parse_amount(debit) if debit else 0.0)
+            transaction_type, amount = _signed(amount, cell(row, "type"))
+            yield line, {
+                "type": transaction_type,
+                "amount": amount,
+                "date": parse_date(cell(row, "date"), dayfirst),
+                "category": cell(row, "category") or None,
+                "description": cell(row, "description") or None,
+            }
+        except (ValueError, OverflowError) as e:
+            yield line, f"could not parse row: {e}"
+
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def ofx_rows(stream: io.TextIOBase, read_size: int = 64 * 1024) -> Iterator[ParsedRow]:
+    """Transactions from OFX 1.x (SGML) or 2.x (XML), read incrementally.
+    
+    At most one incomplete <STMTTRN> block is buffered between reads.
+    """
+    buffer = ""
+    number = 0
+    first = True
+    while True:
+        chunk = stream.read(read_size)
+        if first and "OFX" not in chunk.upper():
+            raise ImportFormatError("File is not OFX")
+        first = False
+        
+        buffer += chunk
+        end = 0
+        for match in OFX_TRANSACTION.finditer(buffer):
+            end = match.end()
+            number += 1
+            fields = {tag.upper(): value.strip() for tag, value in OFX_FIELD.findall(match.group(1))}
+            try:
+                transaction_type, amount = _signed(parse_amount(fields.get("TRNAMT", "")), None)
+                description = " - ".join(part for part in (fields.get("NAME"), fields.get("MEMO")) if part)
+                yield number, {
+                    "type": transaction_type,
+                    "amount": amount,
+                    "date": datetime.strptime(fields.get("DTPOSTED", "")[:8], "%Y%m%d").date(),
+                    "category": None,
+                    "description": description or None,
+                }
+            except ValueError as e:
+                yield number, f"could not parse transaction: {e}"
+        if not chunk:
+            return
+        
+        # Drop everything before the next (incomplete) transaction; keep a
+        # short tail when there is none in case its tag is split across reads
+        buffer = buffer[end:]
+        start = buffer.upper().find("<STMTTRN>")
+        buffer = buffer[start:] if start >= 0 else buffer[-16:]
+
+async def _write_chunk(db, user_id: str, items: List[TransactionCreate]):
+    """Insert one validated chunk with COPY (asyncpg) or a multi-row INSERT."""
+    now = datetime.utcnow()
+    transactions = [
+        Transaction(id=str(uuid.uuid4()), user_id=user_id, created_at=now, updated_at=now, **item.model_dump())
+        for item in items
+    ]
+    
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Transaction.__tablename__,
+            columns=COPY_COLUMNS,
+            records=[
+                (t.id, t.user_id, t.type.name, t.amount, t.category, t.description, t.date, t.created_at, t.updated_at)
+                for t in transactions
+            ]
+        )
+    else:
+        await db.execute(insert(Transaction), [
+            {column: getattr(t, column) for column in COPY_COLUMNS} for t in transactions
+        ])
+    
+    await budget_rollups.apply_transactions(db, transactions)
+
+async def import_transactions(db, user_id: str, upload: BinaryIO, file_format: str,
+                              dayfirst: bool = False, chunk_size: int = settings.IMPORT_CHUNK_SIZE) -> Dict:
+    """Stream an uploaded CSV/OFX file into the user's transactions.
+    
+    Rows are parsed in a worker thread and validated and written one chunk
+    at a time, so memory stays flat whatever the file size. Everything runs
+    in the caller's DB transaction; invalid rows are skipped and reported.
+    """
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        if file_format == "ofx":
+            rows = ofx_rows(stream)
+        else:
+            rows = csv_rows(stream, dayfirst)
+        
+        total = imported = rejected = 0
+        errors = []
+        while True:
+            chunk = await run_in_threadpool(lambda: list(islice(rows, chunk_size)))
+            if not chunk:
+                break
+            
+            valid = []
+            for number, parsed in chunk:
+                total += 1
+                if isinstance(parsed, dict):
+                    try:
+                        valid.append(TransactionCreate(**parsed))
+                        continue
+                    except ValidationError as e:
+                        parsed = "; ".join(error["msg"] for error in e.errors())
+                rejected += 1
+                if len(errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append({"row": number, "error": parsed})
+            
+            if valid:
+                await _write_chunk(db, user_id, valid)
+                imported += len(valid)
+    except csv.Error as e:
+        raise ImportFormatError(f"Malformed CSV: {e}")
+    finally:
+        # The upload owns the underlying file
+        stream.detach()
+    
+    return {"format": file_format, "total_rows": total, "imported": imported, "rejected": rejected, "errors": errors}
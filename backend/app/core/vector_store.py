@@ -0,0 +1,249 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from app.core.config import settings
+
+class VectorHit(NamedTuple):
+    score: float
+    payload: Dict
+
+class QdrantVectorStore:
+    """Vector memory backed by the shared Qdrant collection."""
+    
+    def __init__(self, ai_client, collection_name: str = settings.QDRANT_COLLECTION_NAME):
+        self.ai_client = ai_client
+        self.collection_name = collection_name
+    
+    def _user_filter(self, user_id: Optional[str]):
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        
+        if not user_id:
+            return None
+        return Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+    
+    async def upsert(self, points: List[Dict]):
+        """Upsert points given as {"id", "vector", "payload"} dicts in one call."""
+        from qdrant_client.models import PointStruct
+        
+        client = self.ai_client
+        await client._ensure_collection(self.collection_name)
+        await client._qdrant_call(client.qdrant_client.upsert(
+            collection_name=self.collection_name,
+            points=[PointStruct(**point) for point in points]
+        ))
+    
+    async def search(self, vector: List[float], user_id: Optional[str] = None, limit: int = 5) -> List[VectorHit]:
+        client = self.ai_client
+        await client._ensure_collection(self.collection_name)
+        results = await client._qdrant_call(client.qdrant_client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            limit=limit,
+            query_filter=self._user_filter(user_id)
+        ))
+        return [VectorHit(result.score, result.payload or {}) for result in results]
+    
+    async def count(self, user_id: str) -> int:
+        client = self.ai_client
+        await client._ensure_collection(self.collection_name)
+        result = await client._qdrant_call(client.qdrant_client.count(
+            collection_name=self.collection_name,
+            count_filter=self._user_filter(user_id),
+            exact=True
+        ))
+        return result.count
+    
+    async def load(self, user_id: str, batch_size: int = 256) -> List[Dict]:
+        """Fetch every point (with its vector) belonging to a user."""
+        client = self.ai_client
+        await client._ensure_collection(self.collection_name)
+        
+        points = []
+        offset = None
+        while True:
+            records, offset = await client._qdrant_call(client.qdrant_client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._user_filter(user_id),
+                limit=batch_size,
+                offset=offset,
+                with_vectors=True
+            ))
+            points.extend({"id": r.id, "vector": r.vector, "payload": r.payload or {}} for r in records)
+            if offset is None:
+                return points
+    
+    def stats(self) -> Dict:
+        return {"backend": "qdrant"}
+
+class _UserIndex:
+    """A user's vectors as a growable, row-normalized float32 matrix."""
+    
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.payloads: List[Dict] = []
+        self.loaded_at = time.monotonic()
+    
+    @property
+    def size(self) -> int:
+        return len(self.payloads)
+    
+    def add(self, vectors: np.ndarray, payloads: List[Dict]):
+        needed = self.size + len(payloads)
+        if needed > len(self.vectors):
+            grown = np.empty((max(needed, 2 * len(self.vectors)), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        self.vectors[self.size:needed] = vectors
+        self.payloads.extend(payloads)
+    
+    def search(self, query: np.ndarray, limit: int) -> List[VectorHit]:
+        if not self.size or limit <= 0:
+            return []
+        scores = self.vectors[:self.size] @ query
+        if limit < self.size:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(self.size)
+        top = top[np.argsort(-scores[top])]
+        return [VectorHit(float(scores[i]), self.payloads[i]) for i in top]
+
+def _normalize(vectors, dim: int) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+class LocalVectorStore:
+    """In-process vector memory with the same interface as QdrantVectorStore.
+    
+    Each user's memories are kept as a float32 matrix and searched with a
+    single matrix-vector product (cosine similarity on normalized rows).
+    Users are evicted least-recently-used once LOCAL_VECTOR_MAX_POINTS is
+    exceeded.
+    
+    With a fallback store, writes go through to it, small users are loaded
+    from it on first search (and reloaded after LOCAL_VECTOR_TTL_SECONDS so
+    other workers' writes show up), and users with more than
+    LOCAL_VECTOR_MAX_USER_POINTS points are searched remotely. Without one,
+    this store is the only copy, which is meant for tests and benchmarks.
+    """
+    
+    def __init__(self, fallback: Optional[QdrantVectorStore] = None,
+                 max_points: int = settings.LOCAL_VECTOR_MAX_POINTS,
+                 max_user_points: int = settings.LOCAL_VECTOR_MAX_USER_POINTS,
+                 ttl_seconds: float = settings.LOCAL_VECTOR_TTL_SECONDS):
+        self.fallback = fallback
+        self.max_points = max_points
+        self.max_user_points = max_user_points
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        self._remote_users: "OrderedDict[str, float]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._points = 0
+        self.local_searches = 0
+        self.remote_searches = 0
+    
+    def _evict(self):
+        while self._points > self.max_points and len(self._users) > 1:
+            _, index = self._users.popitem(last=False)
+            self._points -= index.size
+    
+    def _add(self, user_id: str, vectors: np.ndarray, payloads: List[Dict]):
+        index = self._users.get(user_id)
+        if index is None:
+            index = self._users[user_id] = _UserIndex(vectors.shape[1], capacity=max(64, len(payloads)))
+        index.add(vectors, payloads)
+        self._users.move_to_end(user_id)
+        self._points += len(payloads)
+        self._evict()
+    
+    def _drop(self, user_id: str):
+        index = self._users.pop(user_id, None)
+        if index is not None:
+            self._points -= index.size
+    
+    async def upsert(self, points: List[Dict]):
+        if self.fallback is not None:
+            await self.fallback.upsert(points)
+        
+        by_user: Dict[str, List[Dict]] = {}
+        for point in points:
+            by_user.setdefault(point["payload"].get("user_id"), []).append(point)
+        
+        for user_id, user_points in by_user.items():
+            if self.fallback is not None:
+                # Only resident users are updated in place; the rest are
+                # loaded in full on their next search.
+                index = self._users.get(user_id)
+                if index is None:
+                    continue
+                if index.size + len(user_points) > self.max_user_points:
+                    self._drop(user_id)
+                    continue
+            vectors = [point["vector"] for point in user_points]
+            self._add(user_id, _normalize(vectors, len(vectors[0])), [point["payload"] for point in user_points])
+    
+    async def _load(self, user_id: str, dim: int) -> Optional[_UserIndex]:
+        """Load a user's points from the fallback, or mark them as remote-only."""
+        remote_since = self._remote_users.get(user_id)
+        if remote_since is not None and time.monotonic() - remote_since < self.ttl_seconds:
+            return None
+        
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        index = None
+        try:
+            if await self.fallback.count(user_id) > self.max_user_points:
+                self._remote_users[user_id] = time.monotonic()
+                while len(self._remote_users) > settings.LOCAL_VECTOR_MAX_USERS:
+                    self._remote_users.popitem(last=False)
+            else:
+                self._remote_users.pop(user_id, None)
+                self._drop(user_id)
+                points = await self.fallback.load(user_id)
+                self._add(
+                    user_id,
+                    _normalize([point["vector"] for point in points], dim),
+                    [point["payload"] for point in points]
+                )
+                index = self._users.get(user_id)
+        except Exception as e:
+            # Searching remotely is always correct, just slower
+            print(f"Error loading local vector index: {e}")
+        finally:
+            future.set_result(index)
+            del self._loading[user_id]
+        return index
+    
+    async def search(self, vector: List[float], user_id: Optional[str] = None, limit: int = 5) -> List[VectorHit]:
+        index = self._users.get(user_id)
+        if index is not None and self.fallback is not None and time.monotonic() - index.loaded_at > self.ttl_seconds:
+            index = None
+        
+        if index is None and self.fallback is not None:
+            if user_id:
+                index = await self._load(user_id, len(vector))
+            if index is None:
+                self.remote_searches += 1
+                return await self.fallback.search(vector, user_id, limit)
+        
+        if index is None:
+            return []
+        
+        self._users.move_to_end(user_id)
+        self.local_searches += 1
+        return index.search(_normalize(vector, len(vector))[0], limit)
+    
+    def stats(self) -> Dict:
+        return {
+            "backend": "hybrid" if self.fallback is not None else "local",
+            "users": len(self._users),
+            "points": self._points,
+            "local_searches": self.local_searches,
+            "remote_searches": self.remote_searches,
+        }
@@ -1,23 +1,41 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from sqlalchemy import text
 from app.core.config import settings
-from app.core.database import engine, get_db
+from app.core.database import engine, get_db, check_schema_version
+from app.core.ai_client import ai_client
+from app.core.auth_cache import CachedUser, auth_cache
+from app.core.llm_scheduler import SchedulerOverloaded
+from app.core.password_hashing import HashingOverloaded, password_hasher
+from app.core.photo_captioning import photo_captioner
+from app.core.photo_duplicates import duplicate_index
+from app.core.photo_storage import ImageProcessingOverloaded, photo_storage
+from app.core.rate_limit import RateLimited
+from app.core.query_cache import query_cache
+from app.core.redis import close_redis
+from app.core.security import get_current_superuser
 from app.routers import pantry, calendar, budget, hunting, photos, ai_assistant, auth, users
 
-# Import models to ensure they're registered with SQLAlchemy
-from app.models import base
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Nucleus API...")
-    # Create tables
-    async with engine.begin() as conn:
-        await conn.run_sync(base.Base.metadata.create_all)
+    # The schema is owned by Alembic migrations; only check the revision here
+    await check_schema_version()
+    # AI clients warm up in the background; see /ready for their state
+    ai_client.start()
+    photo_captioner.start()
     yield
     # Shutdown
     print("🛑 Shutting down Nucleus API...")
+    await ai_client.memory_writer.drain()
+    await photo_captioner.drain()
+    await ai_client.close()
+    await close_redis()
+    password_hasher.shutdown()
+    photo_storage.shutdown()
 
 app = FastAPI(
     title="Nucleus API",
@@ -33,8 +51,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
+# AI admission control rejects bursts instead of queueing them without bound
+@app.exception_handler(SchedulerOverloaded)
+async def ai_overloaded_handler(request, exc: SchedulerOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "AI service is busy, please retry shortly"},
+        headers={"Retry-After": "5"}
+    )
+
+# Password hashing is bounded too; a login storm gets 503 rather than a stalled worker
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded_handler(request, exc: HashingOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(ImageProcessingOverloaded)
+async def image_processing_overloaded_handler(request, exc: ImageProcessingOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Photo processing is busy, please retry shortly"},
+        headers={"Retry-After": "5"}
+    )
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request, exc: RateLimited):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many attempts, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -44,6 +97,27 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Readiness endpoint: dependencies the API needs to serve traffic
+@app.get("/ready")
+async def readiness_check(response: Response):
+    database = "ok"
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        database = f"unavailable: {e}"
+    
+    # AI services are optional and degrade gracefully, so they are reported
+    # here but do not fail readiness.
+    if database != "ok":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    return {
+        "status": "ready" if database == "ok" else "not ready",
+        "database": database,
+        "ai": ai_client.readiness()
+    }
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -54,6 +128,17 @@ app.include_router(hunting.router, prefix="/api/hunting", tags=["Hunting"])
 app.include_router(photos.router, prefix="/api/photos", tags=["Photos"])
 app.include_router(ai_assistant.router, prefix="/api/ai", tags=["AI Assistant"])
 
+# Cache, throttling and photo pool counters of this API worker (AI counters: /api/ai/stats)
+@app.get("/api/stats")
+async def worker_stats(user: CachedUser = Depends(get_current_superuser)):
+    return {
+        "query_cache": query_cache.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "photo_storage": photo_storage.stats(),
+        "photo_duplicates": duplicate_index.stats(),
+    }
+
 @app.get("/")
 async def root():
     return {
@@ -1,9 +1,10 @@
 from app.models.base import Base, BaseModel
 from app.models.user import User
 from app.models.pantry import PantryItem
-from app.models.budget import Transaction, Budget
+from app.models.budget import Transaction, Budget, MonthlyTotal
 from app.models.hunting import HuntingLocation, HuntingSighting
 from app.models.photo import Photo
+from app.models.collection_version import CollectionVersion
 
 __all__ = [
     "Base",
@@ -12,8 +13,10 @@ __all__ = [
     "PantryItem",
     "Transaction",
     "Budget",
+    "MonthlyTotal",
     "HuntingLocation",
     "HuntingSighting",
-    "Photo"
+    "Photo",
+    "CollectionVersion"
 ]
 
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Float, Date, ForeignKey, Enum
+from sqlalchemy import Column, String, Float, Integer, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 import enum
-from app.models.base import BaseModel
+from app.models.base import Base, BaseModel
 
 class TransactionType(str, enum.Enum):
     INCOME = "income"
@@ -10,8 +11,12 @@ class TransactionType(str, enum.Enum):
 class Transaction(BaseModel):
     """Financial transaction model."""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Per-user listing by date; id makes the keyset order exact
+        Index("ix_transactions_user_date", "user_id", "date", "id"),
+    )
     
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     amount = Column(Float, nullable=False)
     category = Column(String)  # e.g., "groceries", "salary", "entertainment"
@@ -34,3 +39,16 @@ class Budget(BaseModel):
     # Relationships
     user = relationship("User", back_populates="budgets")
 
+class MonthlyTotal(Base):
+    """Rollup of transactions per user, month, category and type."""
+    __tablename__ = "transaction_monthly_totals"
+    
+    # year and month use the same "2024" / "01" strings as Budget
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(String, primary_key=True)
+    month = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)  # "" for uncategorized
+    type = Column(Enum(TransactionType), primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey
+from datetime import datetime
+from app.models.base import Base
+
+class CollectionVersion(Base):
+    """Per-user change counter of a collection (table).
+    
+    Bumped by statement-level triggers on the collection tables (see
+    migration 0004), so every write path, COPY included, moves it in the
+    writer's own transaction. List endpoints derive their ETags from it.
+    """
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    collection = Column(String, primary_key=True)  # table name, e.g. "pantry_items"
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Date, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Float, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -21,8 +21,12 @@ class HuntingLocation(BaseModel):
 class HuntingSighting(BaseModel):
     """Model for recording wildlife sightings."""
     __tablename__ = "hunting_sightings"
+    __table_args__ = (
+        Index("ix_hunting_sightings_user_date", "user_id", "date", "id"),
+        Index("ix_hunting_sightings_user_species_date", "user_id", "species", "date", "id"),
+    )
     
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     location_id = Column(String, ForeignKey("hunting_locations.id"), nullable=True)
     
     species = Column(String, nullable=False)  # e.g., "deer", "turkey"
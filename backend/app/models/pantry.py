@@ -1,12 +1,16 @@
-from sqlalchemy import Column, String, Integer, Float, Date, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class PantryItem(BaseModel):
     """Pantry item model for tracking food inventory."""
     __tablename__ = "pantry_items"
+    __table_args__ = (
+        Index("ix_pantry_items_user_created", "user_id", "created_at", "id"),
+        Index("ix_pantry_items_user_expiration", "user_id", "expiration_date"),
+    )
     
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     category = Column(String)  # e.g., "dairy", "meat", "produce", "pantry"
     quantity = Column(Float, default=1.0)
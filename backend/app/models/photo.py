@@ -1,17 +1,23 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Float, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Photo(BaseModel):
     """Model for tracking photos with location and metadata."""
     __tablename__ = "photos"
+    __table_args__ = (
+        Index("ix_photos_user_created", "user_id", "created_at", "id"),
+        Index("ix_photos_user_content_hash", "user_id", "content_hash"),
+    )
     
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     
     # File info
     file_path = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
     file_size = Column(Float)  # in bytes
+    content_hash = Column(String(64))  # sha256 of uploaded files, which are stored under it
+    perceptual_hash = Column(BigInteger)  # 64-bit dHash (as signed), for near-duplicate detection
     
     # Location
     latitude = Column(Float)
@@ -1,6 +1,10 @@
+import json
 from fastapi import APIRouter, Depends
-from app.core.security import get_current_user_id
+from fastapi.responses import StreamingResponse
+from app.core.auth_cache import CachedUser
+from app.core.security import get_current_superuser, get_current_user_id
 from app.core.ai_client import ai_client
+from app.core.photo_captioning import photo_captioner
 from app.schemas.ai import ChatRequest, ChatResponse
 
 router = APIRouter()
@@ -22,6 +26,31 @@ async def chat_with_ai(
         user_id=user_id
     )
 
+@router.post("/chat/stream")
+async def stream_chat_with_ai(
+    request: ChatRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Chat with the AI assistant, streaming tokens as Server-Sent Events."""
+    async def event_stream():
+        async for token in ai_client.stream_chat(
+            user_message=request.message,
+            system_context="You are helping the user manage their life through the Nucleus app.",
+            user_id=user_id
+        ):
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
+
 @router.post("/summarize")
 async def generate_summary(
     request: ChatRequest,
@@ -30,7 +59,8 @@ async def generate_summary(
     """Generate an AI summary of content."""
     summary = await ai_client.generate_summary(
         content=request.message,
-        context="Provide a concise summary for the user's life management system."
+        context="Provide a concise summary for the user's life management system.",
+        user_id=user_id
     )
     
     return {
@@ -38,3 +68,10 @@ async def generate_summary(
         "user_id": user_id
     }
 
+
+@router.get("/stats")
+async def get_ai_stats(
+    user: CachedUser = Depends(get_current_superuser)
+):
+    """Get cache and pipeline counters for this API worker (superusers only)."""
+    return {**ai_client.stats(), "photo_captioner": photo_captioner.stats()}
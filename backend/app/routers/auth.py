@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from app.core.auth_cache import CachedUser, auth_cache
 from app.core.database import get_db
+from app.core.password_hashing import password_hasher
+from app.core.rate_limit import limit_auth_attempts
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token
 )
@@ -17,12 +18,15 @@ router = APIRouter()
 
 @router.post("/register", response_model=TokenResponse)
 async def register(
-    request: RegisterRequest,
+    payload: RegisterRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Register a new user."""
+    await limit_auth_attempts(request, payload.email)
+    
     # Check if user already exists
-    result = await db.execute(select(User).where(User.email == request.email))
+    result = await db.execute(select(User).where(User.email == payload.email))
     existing_user = result.scalar_one_or_none()
     
     if existing_user:
@@ -33,14 +37,15 @@ async def register(
     
     # Create new user
     user = User(
-        email=request.email,
-        hashed_password=get_password_hash(request.password),
-        full_name=request.full_name
+        email=payload.email,
+        hashed_password=await password_hasher.hash(payload.password),
+        full_name=payload.full_name
     )
     
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    await auth_cache.set_user(CachedUser.from_model(user))
     
     # Generate tokens
     access_token = create_access_token(data={"sub": user.id})
@@ -56,15 +61,21 @@ async def register(
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
-    request: LoginRequest,
+    payload: LoginRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Login and receive access token."""
+    await limit_auth_attempts(request, payload.email)
+    
     # Find user
-    result = await db.execute(select(User).where(User.email == request.email))
+    result = await db.execute(select(User).where(User.email == payload.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(
+        payload.password, user.hashed_password if user else None
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -76,6 +87,14 @@ async def login(
             detail="Account is inactive"
         )
     
+    # The stored hash used other bcrypt costs; replace it now that we have the password
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+    
+    # Warm the cache the next authenticated requests resolve the user from
+    await auth_cache.set_user(CachedUser.from_model(user))
+    
     # Generate tokens
     access_token = create_access_token(data={"sub": user.id})
     refresh_token = create_refresh_token(data={"sub": user.id})
@@ -1,29 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
+from datetime import date
+from app.core import budget_rollups, transaction_import
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params, paginate
+from app.core.query_cache import CachedResponse, query_cache
+from app.core.responses import FastJSONResponse
+from app.core.repository import Repository
 from app.core.security import get_current_user_id
-from app.models.budget import Transaction, Budget
+from app.models.budget import Transaction, Budget, TransactionType
 from app.schemas.budget import (
-    TransactionCreate, TransactionResponse,
-    BudgetCreate, BudgetResponse
+    TransactionCreate, TransactionResponse, TransactionImportResponse,
+    BudgetCreate, BudgetResponse,
+    BudgetAnalyticsResponse
 )
 
 router = APIRouter()
+transactions = Repository(Transaction)
+budgets = Repository(Budget)
 
 # Transaction endpoints
 @router.get("/transactions", response_model=List[TransactionResponse])
 async def get_transactions(
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    type: Optional[TransactionType] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all transactions for the current user."""
-    result = await db.execute(
-        select(Transaction).where(Transaction.user_id == user_id)
-    )
-    transactions = result.scalars().all()
-    return transactions
+    """Get transactions for the current user, most recent date first."""
+    query = select(Transaction).where(Transaction.user_id == user_id)
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date <= end_date)
+    if category:
+        query = query.where(Transaction.category == category)
+    if type:
+        query = query.where(Transaction.type == type)
+    
+    return await paginate(db, query, [Transaction.date, Transaction.id], page, response,
+                          TransactionResponse, user_id=user_id)
 
 @router.post("/transactions", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
@@ -32,27 +54,58 @@ async def create_transaction(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new transaction."""
-    transaction = Transaction(
-        user_id=user_id,
-        **transaction_data.model_dump()
-    )
-    db.add(transaction)
+    transaction = await transactions.create(db, user_id, transaction_data.model_dump())
+    # The monthly rollup is updated in the same commit as the transaction
+    await budget_rollups.apply_transactions(db, [transaction])
     await db.commit()
-    await db.refresh(transaction)
+    await query_cache.invalidate(user_id, Transaction.__tablename__)
     return transaction
 
+@router.post("/transactions/import", response_model=TransactionImportResponse)
+async def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ofx)$", description="Defaults to the file extension"),
+    dayfirst: bool = Query(False, description="Read ambiguous CSV dates as day/month"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Bulk import transactions from a bank CSV or OFX/QFX export."""
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = "ofx" if extension in ("ofx", "qfx") else "csv"
+    
+    try:
+        summary = await transaction_import.import_transactions(db, user_id, file.file, format, dayfirst)
+    except transaction_import.ImportFormatError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    await db.commit()
+    await query_cache.invalidate(user_id, Transaction.__tablename__)
+    return summary
+
 # Budget endpoints
 @router.get("/budgets", response_model=List[BudgetResponse])
 async def get_budgets(
+    response: Response,
+    year: Optional[str] = None,
+    month: Optional[str] = None,
+    category: Optional[str] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all budgets for the current user."""
-    result = await db.execute(
-        select(Budget).where(Budget.user_id == user_id)
-    )
-    budgets = result.scalars().all()
-    return budgets
+    """Get budgets for the current user, newest first."""
+    query = select(Budget).where(Budget.user_id == user_id)
+    if year:
+        query = query.where(Budget.year == year)
+    if month:
+        query = query.where(Budget.month == month)
+    if category:
+        query = query.where(Budget.category == category)
+    
+    return await paginate(db, query, [Budget.created_at, Budget.id], page, response, BudgetResponse,
+                          user_id=user_id)
 
 @router.post("/budgets", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
 async def create_budget(
@@ -61,12 +114,31 @@ async def create_budget(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new budget."""
-    budget = Budget(
-        user_id=user_id,
-        **budget_data.model_dump()
-    )
-    db.add(budget)
+    budget = await budgets.create(db, user_id, budget_data.model_dump())
     await db.commit()
-    await db.refresh(budget)
+    await query_cache.invalidate(user_id, Budget.__tablename__)
     return budget
 
+@router.get("/analytics", response_model=BudgetAnalyticsResponse)
+async def get_budget_analytics(
+    request: Request,
+    year: Optional[int] = Query(None, ge=1900, le=9999),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    months: int = Query(6, ge=1, le=36, description="Months of trend, ending at year/month"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Spending vs. budget per category for a month (default: the current one)."""
+    today = date.today()
+    year, month = year or today.year, month or today.month
+    
+    async def load(session) -> CachedResponse:
+        analytics = await budget_rollups.budget_analytics(session, user_id, year, month, months)
+        return CachedResponse(BudgetAnalyticsResponse.model_validate(analytics).model_dump_json().encode("utf-8"), {})
+    
+    # The defaults depend on today's date, so the resolved period is part of the key
+    entry = await query_cache.get_or_load(
+        db, user_id, [Transaction.__tablename__, Budget.__tablename__],
+        f"{query_cache.scope(request)}&period={year}-{month}", load
+    )
+    return FastJSONResponse(entry.body, request)
@@ -1,29 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from app.core import batch
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params, paginate
+from app.core.query_cache import query_cache
+from app.core.repository import Repository
 from app.core.security import get_current_user_id
 from app.models.hunting import HuntingLocation, HuntingSighting
 from app.schemas.hunting import (
     HuntingLocationCreate, HuntingLocationResponse,
-    HuntingSightingCreate, HuntingSightingResponse
+    HuntingSightingCreate, HuntingSightingResponse, HuntingSightingBatchUpdate, HuntingSightingBatchResponse
 )
+from app.schemas.batch import BatchDeleteRequest, BatchDeleteResponse
 
 router = APIRouter()
+locations = Repository(HuntingLocation)
+sightings = Repository(HuntingSighting)
 
 # Location endpoints
 @router.get("/locations", response_model=List[HuntingLocationResponse])
 async def get_hunting_locations(
+    response: Response,
+    type: Optional[str] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all hunting locations for the current user."""
-    result = await db.execute(
-        select(HuntingLocation).where(HuntingLocation.user_id == user_id)
-    )
-    locations = result.scalars().all()
-    return locations
+    """Get hunting locations for the current user, newest first."""
+    query = select(HuntingLocation).where(HuntingLocation.user_id == user_id)
+    if type:
+        query = query.where(HuntingLocation.type == type)
+    
+    return await paginate(db, query, [HuntingLocation.created_at, HuntingLocation.id], page, response,
+                          HuntingLocationResponse, user_id=user_id)
 
 @router.post("/locations", response_model=HuntingLocationResponse, status_code=status.HTTP_201_CREATED)
 async def create_hunting_location(
@@ -32,27 +45,36 @@ async def create_hunting_location(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new hunting location."""
-    location = HuntingLocation(
-        user_id=user_id,
-        **location_data.model_dump()
-    )
-    db.add(location)
+    location = await locations.create(db, user_id, location_data.model_dump())
     await db.commit()
-    await db.refresh(location)
+    await query_cache.invalidate(user_id, HuntingLocation.__tablename__)
     return location
 
 # Sighting endpoints
 @router.get("/sightings", response_model=List[HuntingSightingResponse])
 async def get_hunting_sightings(
+    response: Response,
+    species: Optional[str] = None,
+    location_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all hunting sightings for the current user."""
-    result = await db.execute(
-        select(HuntingSighting).where(HuntingSighting.user_id == user_id)
-    )
-    sightings = result.scalars().all()
-    return sightings
+    """Get hunting sightings for the current user, most recent first."""
+    query = select(HuntingSighting).where(HuntingSighting.user_id == user_id)
+    if species:
+        query = query.where(HuntingSighting.species == species)
+    if location_id:
+        query = query.where(HuntingSighting.location_id == location_id)
+    if start:
+        query = query.where(HuntingSighting.date >= start)
+    if end:
+        query = query.where(HuntingSighting.date <= end)
+    
+    return await paginate(db, query, [HuntingSighting.date, HuntingSighting.id], page, response,
+                          HuntingSightingResponse, user_id=user_id)
 
 @router.post("/sightings", response_model=HuntingSightingResponse, status_code=status.HTTP_201_CREATED)
 async def create_hunting_sighting(
@@ -61,12 +83,89 @@ async def create_hunting_sighting(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new hunting sighting."""
-    sighting = HuntingSighting(
-        user_id=user_id,
-        **sighting_data.model_dump()
-    )
-    db.add(sighting)
+    sighting = await sightings.create(db, user_id, sighting_data.model_dump())
     await db.commit()
-    await db.refresh(sighting)
+    await query_cache.invalidate(user_id, HuntingSighting.__tablename__)
     return sighting
 
+async def _known_locations(db, user_id: str, valid: List, errors: List) -> List:
+    """Drop items whose location_id is not one of the user's locations, reporting them.
+    
+    An unknown location would fail the whole statement on its foreign key.
+    """
+    location_ids = {item.location_id for _, item in valid if item.location_id}
+    if not location_ids:
+        return valid
+    result = await db.execute(
+        select(HuntingLocation.id).where(
+            HuntingLocation.user_id == user_id,
+            HuntingLocation.id.in_(location_ids)
+        )
+    )
+    known = set(result.scalars().all())
+    for index, item in valid:
+        if item.location_id and item.location_id not in known:
+            errors.append(batch.batch_error(index, "Location not found", getattr(item, "id", None)))
+    errors.sort(key=lambda error: error["index"])
+    return [(index, item) for index, item in valid if not item.location_id or item.location_id in known]
+
+@router.post("/sightings/batch", response_model=HuntingSightingBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_hunting_sightings(
+    payload: List[Dict[str, Any]] = Body(..., max_length=settings.BATCH_MAX_ITEMS),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many hunting sightings (HuntingSightingCreate objects) at once."""
+    valid, errors = batch.validate_items(payload, HuntingSightingCreate)
+    valid = await _known_locations(db, user_id, valid, errors)
+    
+    created = await sightings.create_many(db, user_id, [item.model_dump() for _, item in valid])
+    await db.commit()
+    await query_cache.invalidate(user_id, HuntingSighting.__tablename__)
+    return {"items": created, "errors": errors}
+
+@router.patch("/sightings/batch", response_model=HuntingSightingBatchResponse)
+async def update_hunting_sightings(
+    payload: List[Dict[str, Any]] = Body(..., max_length=settings.BATCH_MAX_ITEMS),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Partially update many hunting sightings; each object needs an `id`."""
+    valid, errors = batch.validate_items(payload, HuntingSightingBatchUpdate)
+    valid = await _known_locations(db, user_id, valid, errors)
+    
+    changes, positions = {}, {}
+    for index, item in valid:
+        if item.id in changes:
+            errors.append(batch.batch_error(index, "Duplicate id in batch", item.id))
+            continue
+        changes[item.id] = item.model_dump(exclude_unset=True, exclude={"id"})
+        positions[item.id] = index
+    
+    updated = await sightings.update_many(db, user_id, changes)
+    await db.commit()
+    await query_cache.invalidate(user_id, HuntingSighting.__tablename__)
+    
+    for id, index in positions.items():
+        if id not in updated:
+            errors.append(batch.batch_error(index, "Item not found", id))
+    errors.sort(key=lambda error: error["index"])
+    return {"items": [updated[id] for id in positions if id in updated], "errors": errors}
+
+@router.post("/sightings/batch/delete", response_model=BatchDeleteResponse)
+async def delete_hunting_sightings(
+    request: BatchDeleteRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete many hunting sightings by id."""
+    deleted = await sightings.delete_many(db, user_id, request.ids)
+    await db.commit()
+    await query_cache.invalidate(user_id, HuntingSighting.__tablename__)
+    return {
+        "deleted": [id for id in dict.fromkeys(request.ids) if id in deleted],
+        "errors": [
+            batch.batch_error(index, "Item not found", id)
+            for index, id in enumerate(request.ids) if id not in deleted
+        ]
+    }
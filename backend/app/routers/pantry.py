@@ -1,25 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import date
+from app.core import batch
+from app.core.repository import Repository
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params, paginate
+from app.core.query_cache import CachedResponse, query_cache
+from app.core.responses import FastJSONResponse
 from app.core.security import get_current_user_id
 from app.models.pantry import PantryItem
-from app.schemas.pantry import PantryItemCreate, PantryItemUpdate, PantryItemResponse
+from app.schemas.batch import BatchDeleteRequest, BatchDeleteResponse
+from app.schemas.pantry import (
+    PantryItemCreate, PantryItemUpdate, PantryItemResponse,
+    PantryItemBatchUpdate, PantryItemBatchResponse
+)
 
 router = APIRouter()
+items = Repository(PantryItem)
 
 @router.get("/", response_model=List[PantryItemResponse])
 async def get_pantry_items(
+    response: Response,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    expires_before: Optional[date] = None,
+    expires_after: Optional[date] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all pantry items for the current user."""
-    result = await db.execute(
-        select(PantryItem).where(PantryItem.user_id == user_id)
-    )
-    items = result.scalars().all()
-    return items
+    """Get pantry items for the current user, newest first."""
+    query = select(PantryItem).where(PantryItem.user_id == user_id)
+    if category:
+        query = query.where(PantryItem.category == category)
+    if location:
+        query = query.where(PantryItem.location == location)
+    if expires_before:
+        query = query.where(PantryItem.expiration_date <= expires_before)
+    if expires_after:
+        query = query.where(PantryItem.expiration_date >= expires_after)
+    
+    return await paginate(db, query, [PantryItem.created_at, PantryItem.id], page, response,
+                          PantryItemResponse, user_id=user_id)
 
 @router.post("/", response_model=PantryItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_pantry_item(
@@ -28,34 +53,89 @@ async def create_pantry_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new pantry item."""
-    item = PantryItem(
-        user_id=user_id,
-        **item_data.model_dump()
-    )
-    db.add(item)
+    item = await items.create(db, user_id, item_data.model_dump())
     await db.commit()
-    await db.refresh(item)
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
     return item
 
+# Batch endpoints: one statement per batch, invalid items reported per index
+@router.post("/batch", response_model=PantryItemBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_pantry_items(
+    payload: List[Dict[str, Any]] = Body(..., max_length=settings.BATCH_MAX_ITEMS),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many pantry items (PantryItemCreate objects) at once."""
+    valid, errors = batch.validate_items(payload, PantryItemCreate)
+    created = await items.create_many(db, user_id, [item.model_dump() for _, item in valid])
+    await db.commit()
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
+    return {"items": created, "errors": errors}
+
+@router.patch("/batch", response_model=PantryItemBatchResponse)
+async def update_pantry_items(
+    payload: List[Dict[str, Any]] = Body(..., max_length=settings.BATCH_MAX_ITEMS),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Partially update many pantry items; each object needs an `id`."""
+    valid, errors = batch.validate_items(payload, PantryItemBatchUpdate)
+    
+    changes, positions = {}, {}
+    for index, item in valid:
+        if item.id in changes:
+            errors.append(batch.batch_error(index, "Duplicate id in batch", item.id))
+            continue
+        changes[item.id] = item.model_dump(exclude_unset=True, exclude={"id"})
+        positions[item.id] = index
+    
+    updated = await items.update_many(db, user_id, changes)
+    await db.commit()
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
+    
+    for id, index in positions.items():
+        if id not in updated:
+            errors.append(batch.batch_error(index, "Item not found", id))
+    errors.sort(key=lambda error: error["index"])
+    return {"items": [updated[id] for id in positions if id in updated], "errors": errors}
+
+@router.post("/batch/delete", response_model=BatchDeleteResponse)
+async def delete_pantry_items(
+    request: BatchDeleteRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete many pantry items by id."""
+    deleted = await items.delete_many(db, user_id, request.ids)
+    await db.commit()
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
+    return {
+        "deleted": [id for id in dict.fromkeys(request.ids) if id in deleted],
+        "errors": [
+            batch.batch_error(index, "Item not found", id)
+            for index, id in enumerate(request.ids) if id not in deleted
+        ]
+    }
+
 @router.get("/{item_id}", response_model=PantryItemResponse)
 async def get_pantry_item(
     item_id: str,
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific pantry item."""
-    result = await db.execute(
-        select(PantryItem).where(
-            PantryItem.id == item_id,
-            PantryItem.user_id == user_id
-        )
-    )
-    item = result.scalar_one_or_none()
+    async def load(session) -> Optional[CachedResponse]:
+        item = await items.get(session, user_id, item_id)
+        if item is None:
+            return None
+        return CachedResponse(PantryItemResponse.model_validate(item).model_dump_json().encode("utf-8"), {})
     
-    if not item:
+    entry = await query_cache.get_or_load(db, user_id, [PantryItem.__tablename__], query_cache.scope(request), load)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    return item
+    return FastJSONResponse(entry.body, request)
 
 @router.put("/{item_id}", response_model=PantryItemResponse)
 async def update_pantry_item(
@@ -65,23 +145,13 @@ async def update_pantry_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Update a pantry item."""
-    result = await db.execute(
-        select(PantryItem).where(
-            PantryItem.id == item_id,
-            PantryItem.user_id == user_id
-        )
-    )
-    item = result.scalar_one_or_none()
+    item = await items.update(db, user_id, item_id, item_data.model_dump(exclude_unset=True))
     
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    # Update fields
-    for field, value in item_data.model_dump(exclude_unset=True).items():
-        setattr(item, field, value)
-    
     await db.commit()
-    await db.refresh(item)
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
     return item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -91,17 +161,9 @@ async def delete_pantry_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a pantry item."""
-    result = await db.execute(
-        select(PantryItem).where(
-            PantryItem.id == item_id,
-            PantryItem.user_id == user_id
-        )
-    )
-    item = result.scalar_one_or_none()
-    
-    if not item:
+    if not await items.delete(db, user_id, item_id):
         raise HTTPException(status_code=404, detail="Item not found")
     
-    await db.delete(item)
     await db.commit()
+    await query_cache.invalidate(user_id, PantryItem.__tablename__)
 
@@ -1,25 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+import os
+from app.core.ai_client import ai_client
 from app.core.database import get_db
+from app.core.pagination import PageParams, page_params, paginate
+from app.core.photo_captioning import photo_captioner
+from app.core.photo_duplicates import duplicate_index, to_column
+from app.core.photo_storage import photo_storage
+from app.core.query_cache import query_cache
+from app.core.repository import Repository
 from app.core.security import get_current_user_id
 from app.models.photo import Photo
-from app.schemas.photo import PhotoCreate, PhotoResponse
+from app.schemas.photo import DuplicateCluster, PhotoCreate, PhotoResponse, PhotoUploadFields
 
 router = APIRouter()
+photos = Repository(Photo)
 
 @router.get("/", response_model=List[PhotoResponse])
 async def get_photos(
+    response: Response,
+    taken_after: Optional[datetime] = None,
+    taken_before: Optional[datetime] = None,
+    location_name: Optional[str] = None,
+    page: PageParams = Depends(page_params),
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all photos for the current user."""
-    result = await db.execute(
-        select(Photo).where(Photo.user_id == user_id)
-    )
-    photos = result.scalars().all()
-    return photos
+    """Get photos for the current user, newest first."""
+    query = select(Photo).where(Photo.user_id == user_id)
+    if taken_after:
+        query = query.where(Photo.taken_at >= taken_after)
+    if taken_before:
+        query = query.where(Photo.taken_at <= taken_before)
+    if location_name:
+        query = query.where(Photo.location_name == location_name)
+    
+    return await paginate(db, query, [Photo.created_at, Photo.id], page, response, PhotoResponse,
+                          user_id=user_id)
+
+@router.get("/search", response_model=List[PhotoResponse])
+async def search_photos(
+    q: str = Query(..., min_length=1, max_length=500, description="What to look for, in plain words"),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Semantic search over AI captions and tags, best match first."""
+    hits = await ai_client.search_photos(q, user_id, limit)
+    ids = list(dict.fromkeys(hit.payload["photo_id"] for hit in hits if hit.payload.get("photo_id")))
+    if not ids:
+        return []
+    
+    result = await db.execute(select(Photo).where(Photo.user_id == user_id, Photo.id.in_(ids)))
+    found = {photo.id: photo for photo in result.scalars()}
+    # Photos deleted since they were indexed simply drop out
+    return [found[photo_id] for photo_id in ids if photo_id in found]
+
+@router.get("/duplicates", response_model=List[DuplicateCluster])
+async def get_duplicate_photos(
+    max_distance: Optional[int] = Query(None, ge=0, le=7, description="Differing hash bits still counted as a duplicate"),
+    limit: int = Query(50, ge=1, le=500),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Clusters of near-identical photos (by perceptual hash), largest first.
+    
+    max_distance defaults to PHOTO_DUPLICATE_MAX_DISTANCE. Photos without
+    a hash yet (see the hash_photos command) are not considered.
+    """
+    groups = (await duplicate_index.clusters(db, user_id, max_distance))[:limit]
+    ids = [photo_id for group in groups for photo_id in group]
+    if not ids:
+        return []
+    
+    result = await db.execute(select(Photo).where(Photo.user_id == user_id, Photo.id.in_(ids)))
+    found = {photo.id: photo for photo in result.scalars()}
+    clusters = []
+    for group in groups:
+        members = sorted((found[photo_id] for photo_id in group if photo_id in found), key=lambda p: (p.created_at, p.id))
+        if len(members) > 1:
+            clusters.append({"photos": members})
+    return clusters
+
+async def _near_duplicate(db: AsyncSession, user_id: str, value: int) -> Optional[Photo]:
+    """The user's closest photo within PHOTO_DUPLICATE_MAX_DISTANCE of a perceptual hash."""
+    found = await duplicate_index.find(db, user_id, value)
+    if not found:
+        return None
+    result = await db.execute(select(Photo).where(Photo.user_id == user_id, Photo.id.in_([photo_id for _, photo_id in found])))
+    photos_by_id = {photo.id: photo for photo in result.scalars()}
+    for _, photo_id in found:
+        if photo_id in photos_by_id:
+            return photos_by_id[photo_id]
+    return None
 
 @router.post("/", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED)
 async def create_photo(
@@ -27,13 +106,103 @@ async def create_photo(
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new photo record."""
-    photo = Photo(
-        user_id=user_id,
-        **photo_data.model_dump()
-    )
-    db.add(photo)
+    """Create a new photo record.
+    
+    ai_caption and ai_tags are filled in the background shortly after.
+    """
+    photo = await photos.create(db, user_id, photo_data.model_dump())
     await db.commit()
-    await db.refresh(photo)
+    await query_cache.invalidate(user_id, Photo.__tablename__)
+    if photo.ai_caption is None:
+        photo_captioner.enqueue(photo.id)
     return photo
 
+@router.post("/upload", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED)
+async def upload_photo(
+    request: Request,
+    response: Response,
+    skip_duplicates: bool = Query(True, description="Return an existing near-identical photo instead of storing this one"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload an image as multipart/form-data.
+    
+    The image goes in the "file" part, optional metadata (see
+    PhotoUploadFields; tags may repeat) in form fields. The file is streamed
+    to disk, stored under its sha256 with web and thumbnail renditions, and
+    captioned in the background. Location, capture time and camera not sent
+    by the client are taken from the EXIF header. Uploading a file the user already has
+    returns the existing photo with 200, and so does uploading a near-identical
+    one (same perceptual hash within PHOTO_DUPLICATE_MAX_DISTANCE) unless
+    skip_duplicates is false.
+    """
+    upload = await photo_storage.receive(request)
+    try:
+        try:
+            fields = PhotoUploadFields.model_validate({
+                name: values if name == "tags" else values[-1]
+                for name, values in upload.fields.items() if name in PhotoUploadFields.model_fields
+            })
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        
+        result = await db.execute(
+            select(Photo).where(Photo.user_id == user_id, Photo.content_hash == upload.content_hash).limit(1)
+        )
+        existing = result.scalar_one_or_none()
+        if existing is not None:
+            response.status_code = status.HTTP_200_OK
+            return existing
+        # Don't hold a connection while the process pool works
+        await db.rollback()
+        
+        processed = await photo_storage.process(upload)
+        if skip_duplicates and processed.dhash is not None:
+            existing = await _near_duplicate(db, user_id, processed.dhash)
+            if existing is not None:
+                response.status_code = status.HTTP_200_OK
+                return existing
+        file_path = await photo_storage.place(upload, processed)
+    finally:
+        upload.discard()
+    
+    data = fields.model_dump()
+    # EXIF fills in whatever the client did not send
+    for name, value in processed.metadata.items():
+        if data.get(name) is None:
+            data[name] = value
+    photo = await photos.create(db, user_id, {
+        **data,
+        "file_path": file_path,
+        "file_name": upload.file_name,
+        "file_size": upload.size,
+        "content_hash": upload.content_hash,
+        "perceptual_hash": to_column(processed.dhash),
+    })
+    await db.commit()
+    await query_cache.invalidate(user_id, Photo.__tablename__)
+    if processed.dhash is not None:
+        duplicate_index.add(user_id, photo.id, processed.dhash)
+    photo_captioner.enqueue(photo.id)
+    return photo
+
+@router.get("/{photo_id}/file")
+async def get_photo_file(
+    photo_id: str,
+    size: str = Query("original", pattern="^(original|web|thumb)$"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Download an uploaded photo, or its web or thumbnail rendition."""
+    photo = await photos.get(db, user_id, photo_id)
+    if photo is None or not photo.content_hash:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    if size == "original":
+        path = photo_storage.local_path(photo.file_path)
+    else:
+        path = photo_storage.path(size, photo.content_hash)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Photo file not found")
+    # Stored files never change under their hash
+    return FileResponse(path, headers={"Cache-Control": "private, max-age=31536000, immutable"})
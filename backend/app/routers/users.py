@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends
+from app.core.auth_cache import CachedUser
 from app.core.security import get_current_user
-from app.models.user import User
 from app.schemas.user import UserResponse
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: CachedUser = Depends(get_current_user)
 ):
     """Get current user information."""
     return UserResponse(
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.core.config import settings
+
+class BatchItemError(BaseModel):
+    index: int  # position of the item in the request
+    id: Optional[str] = None
+    error: str
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=settings.BATCH_MAX_ITEMS)
+
+class BatchDeleteResponse(BaseModel):
+    deleted: List[str]
+    errors: List[BatchItemError]
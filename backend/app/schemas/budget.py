@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.budget import TransactionType
 
 class TransactionBase(BaseModel):
@@ -22,6 +22,17 @@ class TransactionResponse(TransactionBase):
     class Config:
         from_attributes = True
 
+class TransactionImportError(BaseModel):
+    row: int  # CSV line number, or transaction number for OFX
+    error: str
+
+class TransactionImportResponse(BaseModel):
+    format: str
+    total_rows: int
+    imported: int
+    rejected: int
+    errors: List[TransactionImportError]  # the first IMPORT_MAX_REPORTED_ERRORS rejects
+
 class BudgetBase(BaseModel):
     category: str
     monthly_limit: float
@@ -40,3 +51,27 @@ class BudgetResponse(BudgetBase):
     class Config:
         from_attributes = True
 
+class CategoryAnalytics(BaseModel):
+    category: Optional[str] = None
+    limit: Optional[float] = None
+    spent: float
+    remaining: Optional[float] = None
+    percent_used: Optional[float] = None
+    transaction_count: int
+    trend: List[float]  # spent per month, aligned with BudgetAnalyticsResponse.trend
+
+class MonthlyTrend(BaseModel):
+    year: str
+    month: str
+    spent: float
+    income: float
+
+class BudgetAnalyticsResponse(BaseModel):
+    year: str
+    month: str
+    categories: List[CategoryAnalytics]
+    total_spent: float
+    total_income: float
+    total_budgeted: float
+    total_remaining: float
+    trend: List[MonthlyTrend]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from app.schemas.batch import BatchItemError
 
 class HuntingLocationBase(BaseModel):
     name: str
@@ -37,6 +38,21 @@ class HuntingSightingBase(BaseModel):
 class HuntingSightingCreate(HuntingSightingBase):
     pass
 
+class HuntingSightingUpdate(BaseModel):
+    location_id: Optional[str] = None
+    species: Optional[str] = None
+    count: Optional[float] = None
+    date: Optional[datetime] = None
+    gender: Optional[str] = None
+    description: Optional[str] = None
+    photo_url: Optional[str] = None
+    weather: Optional[str] = None
+    temperature: Optional[float] = None
+    notes: Optional[str] = None
+
+class HuntingSightingBatchUpdate(HuntingSightingUpdate):
+    id: str
+
 class HuntingSightingResponse(HuntingSightingBase):
     id: str
     user_id: str
@@ -46,3 +62,6 @@ class HuntingSightingResponse(HuntingSightingBase):
     class Config:
         from_attributes = True
 
+class HuntingSightingBatchResponse(BaseModel):
+    items: List[HuntingSightingResponse]
+    errors: List[BatchItemError]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
+from app.schemas.batch import BatchItemError
 
 class PantryItemBase(BaseModel):
     name: str
@@ -23,6 +24,9 @@ class PantryItemUpdate(BaseModel):
     location: Optional[str] = None
     notes: Optional[str] = None
 
+class PantryItemBatchUpdate(PantryItemUpdate):
+    id: str
+
 class PantryItemResponse(PantryItemBase):
     id: str
     user_id: str
@@ -32,3 +36,6 @@ class PantryItemResponse(PantryItemBase):
     class Config:
         from_attributes = True
 
+class PantryItemBatchResponse(BaseModel):
+    items: List[PantryItemResponse]
+    errors: List[BatchItemError]
@@ -19,8 +19,19 @@ class PhotoBase(BaseModel):
 class PhotoCreate(PhotoBase):
     pass
 
+class PhotoUploadFields(BaseModel):
+    """Optional metadata sent as form fields next to an uploaded file."""
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_name: Optional[str] = None
+    taken_at: Optional[datetime] = None
+    camera: Optional[str] = None
+    tags: Optional[List[str]] = None
+    description: Optional[str] = None
+
 class PhotoResponse(PhotoBase):
     id: str
+    content_hash: Optional[str] = None
     user_id: str
     created_at: datetime
     updated_at: datetime
@@ -28,3 +39,6 @@ class PhotoResponse(PhotoBase):
     class Config:
         from_attributes = True
 
+class DuplicateCluster(BaseModel):
+    """Near-identical photos, earliest first."""
+    photos: List[PhotoResponse]
@@ -0,0 +1,132 @@
+"""Compare database round trips and latency of the old and repository CRUD patterns.
+
+Runs create/get/update/delete of pantry items against DATABASE_URL, once
+the way the routers used to (SELECT, mutate, commit, refresh) and once
+through app.core.repository (one statement with RETURNING). Round trips
+are counted as BEGIN + statements + COMMIT/ROLLBACK seen by the engine.
+The benchmark user and its rows are removed afterwards.
+
+Usage (from backend/, against a migrated database):
+    python -m benchmarks.crud_round_trips [--iterations 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.core.repository import Repository
+from app.models import PantryItem, User
+
+USER_ID = "bench-crud-user"
+ITEM = {"name": "Milk", "category": "dairy", "quantity": 1.0, "unit": "gal",
+        "expiration_date": date(2030, 1, 1), "location": "fridge"}
+CHANGES = {"quantity": 0.5, "notes": "half left"}
+
+class RoundTrips:
+    def __init__(self, engine):
+        self.count = 0
+        for name in ("begin", "commit", "rollback", "before_cursor_execute"):
+            event.listen(engine.sync_engine, name, self._seen)
+    
+    def _seen(self, *args, **kwargs):
+        self.count += 1
+
+# The router code before the repository layer
+async def legacy_create(db: AsyncSession):
+    item = PantryItem(user_id=USER_ID, **ITEM)
+    db.add(item)
+    await db.commit()
+    await db.refresh(item)
+    return item.id
+
+async def legacy_get(db: AsyncSession, item_id: str):
+    result = await db.execute(select(PantryItem).where(PantryItem.id == item_id, PantryItem.user_id == USER_ID))
+    return result.scalar_one_or_none()
+
+async def legacy_update(db: AsyncSession, item_id: str):
+    item = await legacy_get(db, item_id)
+    for field, value in CHANGES.items():
+        setattr(item, field, value)
+    await db.commit()
+    await db.refresh(item)
+
+async def legacy_delete(db: AsyncSession, item_id: str):
+    item = await legacy_get(db, item_id)
+    await db.delete(item)
+    await db.commit()
+
+items = Repository(PantryItem)
+
+async def repository_create(db: AsyncSession):
+    item = await items.create(db, USER_ID, ITEM)
+    await db.commit()
+    return item.id
+
+async def repository_get(db: AsyncSession, item_id: str):
+    return await items.get(db, USER_ID, item_id)
+
+async def repository_update(db: AsyncSession, item_id: str):
+    await items.update(db, USER_ID, item_id, CHANGES)
+    await db.commit()
+
+async def repository_delete(db: AsyncSession, item_id: str):
+    await items.delete(db, USER_ID, item_id)
+    await db.commit()
+
+PATTERNS = {
+    "legacy": (legacy_create, legacy_get, legacy_update, legacy_delete),
+    "repository": (repository_create, repository_get, repository_update, repository_delete),
+}
+
+async def run(sessions, trips: RoundTrips, pattern: str, iterations: int):
+    """Per operation: (round trips per call, median ms)."""
+    create, get, update, delete_ = PATTERNS[pattern]
+    stats = {name: ([], []) for name in ("create", "get", "update", "delete")}
+    
+    async def timed(name, call, *args):
+        # A fresh session per call, like one HTTP request
+        async with sessions() as db:
+            before = trips.count
+            started = time.perf_counter()
+            result = await call(db, *args)
+            stats[name][1].append((time.perf_counter() - started) * 1000)
+            stats[name][0].append(trips.count - before)
+        return result
+    
+    for _ in range(iterations):
+        item_id = await timed("create", create)
+        await timed("get", get, item_id)
+        await timed("update", update, item_id)
+        await timed("delete", delete_, item_id)
+    
+    return {name: (statistics.mean(counts), statistics.median(ms)) for name, (counts, ms) in stats.items()}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Round trips per CRUD request, before and after the repository layer.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    
+    engine = create_async_engine(settings.DATABASE_URL)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    trips = RoundTrips(engine)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(insert(User).values(id=USER_ID, email=f"{USER_ID}@example.com", hashed_password="x"))
+        
+        results = {pattern: await run(sessions, trips, pattern, args.iterations) for pattern in PATTERNS}
+        
+        print(f"{'operation':<10} {'round trips (old -> new)':>26} {'median ms (old -> new)':>26}")
+        for name in ("create", "get", "update", "delete"):
+            (old_trips, old_ms), (new_trips, new_ms) = results["legacy"][name], results["repository"][name]
+            print(f"{name:<10} {old_trips:>14.1f} -> {new_trips:<9.1f} {old_ms:>14.2f} -> {new_ms:<9.2f}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(PantryItem).where(PantryItem.user_id == USER_ID))
+            await conn.execute(delete(User).where(User.id == USER_ID))
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Compare rows/second of the response-model and fast JSON paths for list endpoints.
+
+Seeds pantry items for a throwaway user inside a transaction (rolled back at
+the end) and serves the same page both ways:
+
+- model: SELECT the entity, build ORM objects, validate them through
+  List[PantryItemResponse] (from_attributes) and encode with the stdlib
+  json encoder, which is what FastAPI does for response_model routes
+- fast: SELECT only the response columns as mappings and encode them with
+  orjson (app.core.responses.FastJSONResponse), optionally compressed
+
+Usage (from backend/, against a migrated database):
+    python -m benchmarks.list_serialization [--rows 500] [--repeat 50]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+from fastapi import Request
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.models import PantryItem, User
+from app.schemas.pantry import PantryItemResponse
+
+USER_ID = "bench-serialization-user"
+
+def fake_request(accept_encoding: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+async def seed(db: AsyncSession, rows: int):
+    await db.execute(insert(User).values(id=USER_ID, email=f"{USER_ID}@example.com", hashed_password="x"))
+    await db.execute(text(
+        "INSERT INTO pantry_items (id, user_id, name, category, quantity, unit, expiration_date, location, notes, "
+        "created_at, updated_at) "
+        "SELECT 'bench-' || g, :user, 'Item ' || g, 'produce', g % 7, 'count', DATE '2024-01-01' + g % 90, "
+        "'fridge', 'bought at the farmers market', now(), now() FROM generate_series(1, :rows) AS g"
+    ), {"user": USER_ID, "rows": rows})
+
+async def model_path(db: AsyncSession, adapter: TypeAdapter, limit: int) -> bytes:
+    result = await db.execute(select(PantryItem).where(PantryItem.user_id == USER_ID).limit(limit))
+    items = adapter.validate_python(result.scalars().all(), from_attributes=True)
+    content = adapter.dump_python(items, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+async def fast_path(db: AsyncSession, limit: int, request: Request = None) -> bytes:
+    columns = [getattr(PantryItem, name) for name in PantryItemResponse.model_fields]
+    result = await db.execute(select(*columns).where(PantryItem.user_id == USER_ID).limit(limit))
+    return FastJSONResponse([dict(row) for row in result.mappings()], request).body
+
+async def measure(label: str, call, rows: int, repeat: int):
+    body = await call()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await call()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<20} {rows * repeat / elapsed:>12,.0f} rows/s {len(body):>12,} bytes")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rows/second of list response serialization, before and after.")
+    parser.add_argument("--rows", type=int, default=settings.PAGE_MAX_LIMIT, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    engine = create_async_engine(settings.DATABASE_URL)
+    adapter = TypeAdapter(List[PantryItemResponse])
+    try:
+        async with AsyncSession(engine) as db:
+            await seed(db, args.rows)
+            await measure("model (stdlib json)", lambda: model_path(db, adapter, args.rows), args.rows, args.repeat)
+            await measure("fast (orjson)", lambda: fast_path(db, args.rows), args.rows, args.repeat)
+            await measure("fast + gzip", lambda: fast_path(db, args.rows, fake_request("gzip")), args.rows, args.repeat)
+            await measure("fast + brotli", lambda: fast_path(db, args.rows, fake_request("br")), args.rows, args.repeat)
+            await db.rollback()
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""Compare filtered-search latency and vector memory of the legacy and tenant-aware Qdrant layouts.
+
+Builds two throwaway collections on QDRANT_URL, one with the legacy layout
+(no payload index, float32 vectors in RAM) and one with the current layout
+from app.core.qdrant_layout, loads the same synthetic points into both and
+runs the same user-filtered searches against each.
+
+Usage (from backend/):
+    python -m benchmarks.qdrant_layout [--points 50000] [--users 500] [--queries 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import numpy as np
+from app.core import qdrant_layout
+from app.core.config import settings
+
+LEGACY = "bench_layout_legacy"
+TENANT = "bench_layout_tenant"
+
+def vector_ram_bytes(points: int, quantized: bool, on_disk: bool) -> int:
+    """RAM held by vectors: float32 originals unless on disk, plus the int8 copy."""
+    size = qdrant_layout.VECTOR_SIZE
+    ram = 0 if on_disk else points * size * 4
+    if quantized:
+        ram += points * size
+    return ram
+
+async def load(client, name: str, vectors: np.ndarray, users: np.ndarray, batch_size: int = 512):
+    from qdrant_client.models import Batch
+    
+    for start in range(0, len(vectors), batch_size):
+        end = start + batch_size
+        await client.upsert(collection_name=name, points=Batch(
+            ids=list(range(start, min(end, len(vectors)))),
+            vectors=vectors[start:end].tolist(),
+            payloads=[{"user_id": f"user-{u}", "content": "benchmark"} for u in users[start:end]]
+        ))
+
+async def measure(client, name: str, queries: np.ndarray, users: np.ndarray):
+    from qdrant_client.models import FieldCondition, Filter, MatchValue
+    
+    latencies = []
+    for query, user in zip(queries, users):
+        started = time.perf_counter()
+        await client.search(
+            collection_name=name,
+            query_vector=query.tolist(),
+            query_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=f"user-{user}"))]),
+            limit=5
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+async def main():
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.models import Distance, VectorParams
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.points, qdrant_layout.VECTOR_SIZE), dtype=np.float32)
+    owners = rng.integers(0, args.users, args.points)
+    queries = rng.standard_normal((args.queries, qdrant_layout.VECTOR_SIZE), dtype=np.float32)
+    query_users = rng.integers(0, args.users, args.queries)
+    
+    client = AsyncQdrantClient(url=settings.QDRANT_URL, timeout=120)
+    try:
+        for name in (LEGACY, TENANT):
+            if await qdrant_layout.collection_exists(client, name):
+                await client.delete_collection(name)
+        await client.create_collection(
+            collection_name=LEGACY,
+            vectors_config=VectorParams(size=qdrant_layout.VECTOR_SIZE, distance=Distance.COSINE)
+        )
+        await qdrant_layout.create_collection(client, settings.QDRANT_COLLECTION_NAME, physical_name=TENANT)
+        
+        print(f"{args.points} points across {args.users} users, {args.queries} filtered queries")
+        for name in (LEGACY, TENANT):
+            await load(client, name, vectors, owners)
+        
+        layouts = {
+            LEGACY: vector_ram_bytes(args.points, quantized=False, on_disk=False),
+            TENANT: vector_ram_bytes(args.points, settings.QDRANT_SCALAR_QUANTIZATION, settings.QDRANT_VECTORS_ON_DISK),
+        }
+        for name, ram in layouts.items():
+            # Warm-up pass, then the measured pass
+            await measure(client, name, queries[:10], query_users[:10])
+            p50, p95 = await measure(client, name, queries, query_users)
+            print(f"{name:24s} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   vector RAM ~{ram / 2**20:8.1f} MiB")
+    finally:
+        for name in (LEGACY, TENANT):
+            await client.delete_collection(name)
+        await client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""EXIF header parsing: capture time, GPS position and camera."""
+from datetime import datetime
+from PIL import Image
+from PIL.TiffImagePlugin import IFDRational
+from app.core import exif
+
+def _write(path, tags=None, exif_ifd=None, gps=None, format="JPEG"):
+    data = Image.Exif()
+    for tag, value in (tags or {}).items():
+        data[tag] = value
+    if exif_ifd:
+        data[exif.TAG_EXIF_IFD] = exif_ifd
+    if gps:
+        data[exif.TAG_GPS_IFD] = gps
+    Image.new("RGB", (64, 48), (120, 80, 40)).save(path, format, exif=data.tobytes())
+    return str(path)
+
+def _dms(degrees, minutes, seconds):
+    return (IFDRational(degrees), IFDRational(minutes), IFDRational(seconds))
+
+def test_taken_at_with_offset_is_converted_to_utc(tmp_path):
+    path = _write(tmp_path / "a.jpg", exif_ifd={
+        exif.TAG_DATETIME_ORIGINAL: "2023:06:15 18:30:05",
+        exif.TAG_OFFSET_TIME_ORIGINAL: "-05:00",
+    })
+    assert exif.read_metadata(path)["taken_at"] == datetime(2023, 6, 15, 23, 30, 5)
+
+def test_taken_at_crossing_midnight(tmp_path):
+    path = _write(tmp_path / "a.jpg", exif_ifd={
+        exif.TAG_DATETIME_ORIGINAL: "2024:01:01 07:00:00",
+        exif.TAG_OFFSET_TIME_ORIGINAL: "+10:00",
+    })
+    assert exif.read_metadata(path)["taken_at"] == datetime(2023, 12, 31, 21, 0, 0)
+
+def test_taken_at_without_offset_is_kept_as_is(tmp_path):
+    path = _write(tmp_path / "a.jpg", tags={exif.TAG_DATETIME: "2023:06:15 18:30:05"})
+    assert exif.read_metadata(path)["taken_at"] == datetime(2023, 6, 15, 18, 30, 5)
+
+def test_gps_south_and_west_are_negative(tmp_path):
+    path = _write(tmp_path / "a.jpg", gps={
+        exif.GPS_LATITUDE_REF: "S", exif.GPS_LATITUDE: _dms(33, 51, 0),
+        exif.GPS_LONGITUDE_REF: "W", exif.GPS_LONGITUDE: _dms(70, 30, 36),
+    })
+    metadata = exif.read_metadata(path)
+    assert metadata["latitude"] == -33.85
+    assert abs(metadata["longitude"] - -70.51) < 1e-9
+
+def test_gps_north_and_east_are_positive(tmp_path):
+    path = _write(tmp_path / "a.tif", format="TIFF", gps={
+        exif.GPS_LATITUDE_REF: "N", exif.GPS_LATITUDE: _dms(45, 30, 0),
+        exif.GPS_LONGITUDE_REF: "E", exif.GPS_LONGITUDE: _dms(151, 12, 0),
+    })
+    metadata = exif.read_metadata(path)
+    assert (metadata["latitude"], metadata["longitude"]) == (45.5, 151.2)
+
+def test_gps_without_a_fix_is_ignored(tmp_path):
+    path = _write(tmp_path / "a.jpg", gps={
+        exif.GPS_LATITUDE_REF: "N", exif.GPS_LATITUDE: _dms(0, 0, 0),
+        exif.GPS_LONGITUDE_REF: "E", exif.GPS_LONGITUDE: _dms(0, 0, 0),
+    })
+    assert "latitude" not in exif.read_metadata(path)
+
+def test_camera_joins_make_and_model_once(tmp_path):
+    assert exif.read_metadata(_write(tmp_path / "a.jpg", tags={exif.TAG_MAKE: "Apple", exif.TAG_MODEL: "iPhone 13"})) \
+        == {"camera": "Apple iPhone 13"}
+    assert exif.read_metadata(_write(tmp_path / "b.jpg", tags={exif.TAG_MAKE: "Canon", exif.TAG_MODEL: "Canon EOS R5"})) \
+        == {"camera": "Canon EOS R5"}
+
+def test_files_without_exif(tmp_path):
+    png = tmp_path / "a.png"
+    Image.new("RGB", (8, 8)).save(png)
+    text = tmp_path / "a.txt"
+    text.write_bytes(b"not an image")
+    assert exif.read_metadata(str(png)) == {}
+    assert exif.read_metadata(str(text)) == {}
+    assert exif.read_metadata(str(tmp_path / "missing.jpg")) == {}
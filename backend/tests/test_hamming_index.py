@@ -0,0 +1,65 @@
+"""HammingIndex lookups and clusters against a brute-force Hamming scan."""
+import random
+from app.core import hamming_index
+from app.core.hamming_index import HammingIndex
+
+def _near(rng: random.Random, value: int, bits: int) -> int:
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+def _hashes(seed: int = 7):
+    """Random hashes plus near copies of some of them, so searches find something."""
+    rng = random.Random(seed)
+    hashes = [rng.getrandbits(64) for _ in range(400)]
+    hashes += [_near(rng, rng.choice(hashes), rng.randint(0, 9)) for _ in range(400)]
+    return rng, hashes
+
+def test_search_matches_brute_force():
+    rng, hashes = _hashes()
+    index = HammingIndex()
+    for item, value in enumerate(hashes):
+        index.add(item, value)
+    
+    for max_distance in range(0, 10):
+        for query in rng.sample(hashes, 40) + [rng.getrandbits(64) for _ in range(10)]:
+            expected = sorted(
+                (hamming_index.distance(query, value), item)
+                for item, value in enumerate(hashes) if hamming_index.distance(query, value) <= max_distance
+            )
+            found = index.search(query, max_distance)
+            assert sorted(found) == expected
+            assert [d for d, _ in found] == sorted(d for d, _ in found)
+
+def test_add_keeps_existing_items():
+    index = HammingIndex()
+    index.add("a", 0)
+    index.add("a", (1 << 64) - 1)
+    assert len(index) == 1
+    assert index.search(0, 0) == [(0, "a")]
+
+def test_clusters_are_connected_groups():
+    rng, hashes = _hashes(11)
+    items = list(enumerate(hashes))
+    max_distance = 6
+    
+    # Brute-force connected components over all pairs
+    parent = list(range(len(items)))
+    
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+    
+    for i, (_, a) in enumerate(items):
+        for j in range(i + 1, len(items)):
+            if hamming_index.distance(a, items[j][1]) <= max_distance:
+                parent[find(j)] = find(i)
+    groups = {}
+    for i, (item, _) in enumerate(items):
+        groups.setdefault(find(i), set()).add(item)
+    expected = sorted(sorted(group) for group in groups.values() if len(group) > 1)
+    
+    clusters = hamming_index.clusters(items, max_distance)
+    assert sorted(sorted(cluster) for cluster in clusters) == expected
+    assert [len(cluster) for cluster in clusters] == sorted((len(cluster) for cluster in clusters), reverse=True)
@@ -0,0 +1,34 @@
+"""Keyset pagination cursors."""
+from datetime import date, datetime
+import pytest
+from fastapi import HTTPException
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models import PantryItem, Transaction
+
+def test_cursor_round_trip():
+    columns = [PantryItem.created_at, PantryItem.id]
+    values = (datetime(2024, 3, 1, 12, 30, 15, 123456), "3f2a9c1e-item")
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, columns) == values
+
+def test_cursor_round_trip_with_date():
+    values = (date(2024, 2, 29), "tx-1")
+    assert decode_cursor(encode_cursor(values), [Transaction.date, Transaction.id]) == values
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor(["2024-03-01T12:30:15"]),  # too few values for the sort order
+    encode_cursor(["yesterday", "id"]),  # not a timestamp
+    encode_cursor([12, "id"]),
+    "eyJub3QiOiAiYSBsaXN0In0",  # {"not": "a list"}
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, [PantryItem.created_at, PantryItem.id])
+    assert error.value.status_code == 400
+
+def test_edited_cursor_is_rejected():
+    cursor = encode_cursor((datetime(2024, 3, 1), "id"))
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor[:-3] + "!!!", [PantryItem.created_at, PantryItem.id])
@@ -0,0 +1,76 @@
+"""Repository tests against a migrated database (DATABASE_URL).
+
+Everything runs in one transaction that is rolled back at the end. The
+tests are skipped when the database cannot be reached.
+
+Usage (from backend/):
+    python -m pytest tests
+"""
+from datetime import date
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from app.core.repository import Repository
+from app.models import PantryItem, User
+
+USER_ID = "test-repository-user"
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"database not reachable: {e}")
+    transaction = await conn.begin()
+    session = AsyncSession(bind=conn, expire_on_commit=False)
+    await session.execute(insert(User).values(id=USER_ID, email=f"{USER_ID}@example.com", hashed_password="x"))
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await conn.close()
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_update_many_clears_fields_across_whole_batch(db):
+    items = Repository(PantryItem)
+    created = await items.create_many(db, USER_ID, [
+        {"name": "Milk", "quantity": 2.0, "expiration_date": date(2030, 1, 1)},
+        {"name": "Eggs", "quantity": 12.0, "expiration_date": date(2030, 2, 1)},
+    ])
+    # Like PATCH /batch, which starts from a session without the rows loaded
+    db.expunge_all()
+    
+    # Every row sets the Date and Float fields to NULL
+    updated = await items.update_many(db, USER_ID, {
+        item.id: {"expiration_date": None, "quantity": None} for item in created
+    })
+    
+    assert set(updated) == {item.id for item in created}
+    for item in updated.values():
+        assert item.expiration_date is None
+        assert item.quantity is None
+
+@pytest.mark.asyncio
+async def test_update_many_keeps_fields_an_item_leaves_out(db):
+    items = Repository(PantryItem)
+    milk, eggs = await items.create_many(db, USER_ID, [
+        {"name": "Milk", "quantity": 2.0, "expiration_date": date(2030, 1, 1)},
+        {"name": "Eggs", "quantity": 12.0, "expiration_date": date(2030, 2, 1)},
+    ])
+    db.expunge_all()
+    
+    updated = await items.update_many(db, USER_ID, {
+        milk.id: {"expiration_date": None},
+        eggs.id: {"quantity": 6.0},
+    })
+    
+    assert updated[milk.id].expiration_date is None
+    assert updated[milk.id].quantity == 2.0
+    assert updated[eggs.id].expiration_date == date(2030, 2, 1)
+    assert updated[eggs.id].quantity == 6.0
@@ -0,0 +1,87 @@
+"""CSV and OFX parsing for transaction imports."""
+import io
+from datetime import date
+import pytest
+from app.core.transaction_import import ImportFormatError, csv_rows, ofx_rows, parse_amount
+from app.models.budget import TransactionType
+
+def test_parse_amount():
+    assert parse_amount(" $1,234.50 ") == 1234.5
+    assert parse_amount("(12.00)") == -12.0
+    with pytest.raises(ValueError):
+        parse_amount("abc")
+
+def test_csv_signed_amounts_and_type_column():
+    rows = list(csv_rows(io.StringIO(
+        "Date,Amount,Type,Category,Memo\n"
+        "2024-01-05,-12.50,,food,Groceries\n"
+        "2024-01-06,1000,,salary,\n"
+        "2024-01-07,30,debit,fuel,Gas\n"
+        "\n"
+        "2024-01-08,abc,,,\n"
+    )))
+    assert rows[0] == (2, {
+        "type": TransactionType.EXPENSE, "amount": 12.5, "date": date(2024, 1, 5),
+        "category": "food", "description": "Groceries",
+    })
+    assert rows[1][1]["type"] == TransactionType.INCOME and rows[1][1]["description"] is None
+    assert rows[2][1]["type"] == TransactionType.EXPENSE and rows[2][1]["amount"] == 30
+    # Blank lines are skipped; unparseable rows are reported with their line number
+    assert rows[3][0] == 6 and isinstance(rows[3][1], str)
+    assert len(rows) == 4
+
+def test_csv_debit_credit_columns_and_day_first_dates():
+    rows = list(csv_rows(io.StringIO(
+        "Posted Date,Debit,Credit,Payee\n"
+        "05/01/2024,25.00,,Shop\n"
+        "06/01/2024,,100.00,Employer\n"
+    ), dayfirst=True))
+    assert [(row["type"], row["amount"], row["date"]) for _, row in rows] == [
+        (TransactionType.EXPENSE, 25.0, date(2024, 1, 5)),
+        (TransactionType.INCOME, 100.0, date(2024, 1, 6)),
+    ]
+
+@pytest.mark.parametrize("content", ["", "Description,Category\nx,y\n"])
+def test_csv_without_required_columns(content):
+    with pytest.raises(ImportFormatError):
+        list(csv_rows(io.StringIO(content)))
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>-42.10
+<NAME>Hardware Store
+<MEMO>Ammo
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240110
+<TRNAMT>500.00
+<NAME>Payroll
+</STMTTRN>
+<STMTTRN>
+<DTPOSTED>20240111
+<TRNAMT>n/a
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+@pytest.mark.parametrize("read_size", [7, 64 * 1024])
+def test_ofx_transactions(read_size):
+    rows = list(ofx_rows(io.StringIO(OFX), read_size=read_size))
+    assert rows[:2] == [
+        (1, {"type": TransactionType.EXPENSE, "amount": 42.1, "date": date(2024, 1, 5),
+             "category": None, "description": "Hardware Store - Ammo"}),
+        (2, {"type": TransactionType.INCOME, "amount": 500.0, "date": date(2024, 1, 10),
+             "category": None, "description": "Payroll"}),
+    ]
+    assert rows[2][0] == 3 and isinstance(rows[2][1], str)
+    assert len(rows) == 3
+
+def test_ofx_rejects_other_files():
+    with pytest.raises(ImportFormatError):
+        list(ofx_rows(io.StringIO("Date,Amount\n2024-01-01,1\n")))
@@ -32,6 +32,7 @@ echo "  cd backend"
 echo "  python -m venv venv"
 echo "  source venv/bin/activate  # Windows: venv\\Scripts\\activate"
 echo "  pip install -r requirements.txt"
+echo "  alembic upgrade head"
 echo "  uvicorn app.main:app --reload --port 8000"
 echo ""
 echo "Frontend (in another terminal):"